@@ -0,0 +1,150 @@
+import hashlib
+import json
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+from http_client import SessionPool, phase_timings, prepare_request, request_timeout
+from variables import UndefinedVariableError
+
+
+def select_requests(saved_requests, indices=None, match=None, methods=None):
+    """
+    Return (index, request) pairs of saved_requests to run.
+    indices limits the run to the given list positions, match is a regex searched in the description and URL,
+    and methods limits the run to the given HTTP methods. Filters are combined with AND.
+    Raises ValueError for an index without a saved request and for an invalid regex.
+    """
+    try:
+        pattern = re.compile(match, re.IGNORECASE) if match else None
+    except re.error as e:
+        raise ValueError(f"Invalid regex {match!r}: {e}") from e
+    wanted_methods = {m.upper() for m in methods} if methods else None
+    wanted_indices = set(indices) if indices else None
+    unknown = sorted(index for index in wanted_indices or () if not 0 <= index < len(saved_requests))
+    if unknown:
+        raise ValueError(f"No saved request at index {', '.join(map(str, unknown))}")
+    selected = []
+    for index, req in enumerate(saved_requests):
+        if wanted_indices is not None and index not in wanted_indices:
+            continue
+        if wanted_methods is not None and req.get("method", "GET").upper() not in wanted_methods:
+            continue
+        if pattern is not None and not (pattern.search(req.get("description", "")) or pattern.search(req.get("url", ""))):
+            continue
+        selected.append((index, req))
+    return selected
+
+
+def new_result(index, req):
+    """Result record of a saved request that has not been sent (yet)"""
+    return {
+        "index": index,
+        "id": req.get("id"),
+        "method": req.get("method", "GET"),
+        "description": req.get("description", ""),
+        "url": req.get("url", ""),
+        "status": None,
+        "reason": None,
+        "ok": False,
+        "started_at": datetime.now().isoformat(timespec="milliseconds"),
+        "elapsed": None,
+        "bytes": None,
+        "body_sha256": None,
+        "connection_reused": None,
+        "timings": None,
+        "error": None
+    }
+
+
+def run_saved_request(session_pool, index, req, variable_dict, timeout=None, settings=None, on_response=None):
+    """
+    Substitute variables in a saved request, send it and return a result record (a JSON-serializable dict).
+    Errors are reported in the "error" field instead of being raised.
+    Without an explicit timeout the request's own connect/read timeouts (or the defaults in settings) are used.
+    on_response(response, content) is called after a successful send; a ValueError it raises marks the result as failed.
+    """
+    from requests.exceptions import RequestException  # Loaded with the first session; see SessionPool
+
+    if timeout is None:
+        timeout = request_timeout(req, settings)
+    method = req.get("method", "GET")
+    result = new_result(index, req)
+    try:
+        url, headers, send_kwargs = prepare_request(req, variable_dict)
+    except UndefinedVariableError as e:
+        result["error"] = f"Undefined variable: {e.args[0]}"
+        return result
+    result["url"] = url
+
+    start_time = time.perf_counter()
+    try:
+        response = session_pool.request(method, url, headers=headers, timeout=timeout, stream=True, **send_kwargs)
+        headers_received = time.perf_counter()
+        content = response.content
+    except RequestException as e:
+        result["elapsed"] = round(time.perf_counter() - start_time, 6)
+        result["error"] = f"{type(e).__name__}: {e}"
+        return result
+    timings = phase_timings(response, start_time, headers_received, time.perf_counter(), len(content))
+    result["elapsed"] = round(timings["total"], 6)
+    result["status"] = response.status_code
+    result["reason"] = response.reason
+    result["ok"] = response.status_code < 400
+    result["bytes"] = len(content)
+    result["body_sha256"] = hashlib.sha256(content).hexdigest()
+    result["connection_reused"] = getattr(response, "connection_reused", None)
+    result["timings"] = {key: round(value, 6) if isinstance(value, float) else value for key, value in timings.items()}
+    if on_response is not None and result["ok"]:
+        try:
+            on_response(response, content)
+        except ValueError as e:
+            result["ok"] = False
+            result["error"] = str(e)
+    return result
+
+
+def run_batch(selected, variable_dict, settings, output, concurrency=8, timeout=None):
+    """
+    Run the selected (index, request) pairs concurrently on a bounded worker pool.
+    Each result is written to output as one JSON line as soon as it completes.
+    Returns a summary dict with counts and total wall time.
+    """
+    concurrency = max(1, concurrency)
+    # Keep at least one connection per worker so concurrent sends to one host are not serialized
+    session_pool = SessionPool.from_settings(settings, min_pool_size=concurrency)
+    write_lock = threading.Lock()
+    summary = {"total": len(selected), "ok": 0, "failed": 0, "wall_time": None}
+    start_time = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            futures = [
+                executor.submit(run_saved_request, session_pool, index, req, variable_dict, timeout, settings)
+                for index, req in selected
+            ]
+            for future in as_completed(futures):
+                result = future.result()
+                if result["ok"]:
+                    summary["ok"] += 1
+                else:
+                    summary["failed"] += 1
+                with write_lock:
+                    output.write(json.dumps(result, ensure_ascii=False) + "\n")
+                    output.flush()
+    finally:
+        session_pool.close()
+    summary["wall_time"] = round(time.perf_counter() - start_time, 6)
+    return summary
+
+
+def print_summary(summary, stream=sys.stderr):
+    """Print a one-line run summary (to stderr so that JSONL on stdout stays clean)"""
+    print(
+        f"{summary['total']} requests | OK: {summary['ok']} | Failed: {summary['failed']} | "
+        + (f"Skipped: {summary['skipped']} | " if summary.get("skipped") else "")
+        + f"Wall time: {summary['wall_time']:.2f} sec",
+        file=stream
+    )
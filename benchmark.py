@@ -0,0 +1,419 @@
+import http.server
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import parse_qs, urlsplit
+
+from history_store import HistoryStore
+from http_client import SessionPool, format_bytes, format_ms, prepare_send
+from load_test import LatencyHistogram
+from sender import RequestSender
+
+# Stages of one send, in the order RequestSender.send runs them (substitution happens before it)
+STAGES = ("substitute", "send", "download", "format", "history")
+STAGE_LABELS = {
+    "substitute": "Substitute",   # Variables into URL/headers/body, header parsing (prepare_send)
+    "send": "Send",               # Request out and response headers in
+    "download": "Download",       # Streaming the body (spilled into the history store above 1 MB)
+    "format": "Format",           # Preview text for the response area (format_preview)
+    "history": "History",         # Recording the request and response (start_entry + finish_entry)
+    "display": "Display"          # Inserting the preview into a Tk text widget (only with a display)
+}
+
+# Built-in scenarios: body size (bytes), server latency (seconds), chunk size (bytes, None = Content-Length body)
+SCENARIOS = {
+    "small": {"size": 2 * 1024, "latency": 0.0, "chunk": None, "requests": 1000, "concurrency": 8},
+    "medium": {"size": 256 * 1024, "latency": 0.0, "chunk": None, "requests": 200, "concurrency": 4},
+    "large": {"size": 32 * 1024 * 1024, "latency": 0.0, "chunk": None, "requests": 5, "concurrency": 1},
+    "chunked": {"size": 4 * 1024 * 1024, "latency": 0.0, "chunk": 16 * 1024, "requests": 20, "concurrency": 2},
+    "slow": {"size": 16 * 1024, "latency": 0.05, "chunk": None, "requests": 200, "concurrency": 16}
+}
+
+# A regression is reported when a value is worse than the baseline by more than the tolerance and this floor
+MIN_STAGE_REGRESSION = 0.0002   # seconds
+MIN_MEMORY_REGRESSION = 1024 * 1024  # bytes
+
+MIN_STARTUP_REGRESSION = 0.005     # seconds
+
+BASELINE_VERSION = 1
+
+# Code timed in a fresh interpreter by measure_startup: what a script using the core, the command line and
+# the GUI import before they can do any work
+STARTUP_TARGETS = {
+    "core": "import core; core.RequestSender; core.HistoryStore; core.SessionPool; core.prepare_send",
+    "cli": "import cli; cli.build_arg_parser()",
+    "gui": "import main"
+}
+# Modules the headless targets must not import (they are loaded on first use or only by the GUI)
+HEADLESS_FORBIDDEN_MODULES = ("tkinter", "customtkinter", "requests", "urllib3")
+
+# Saved request sent by every scenario, so substitution and header parsing are exercised as in the GUI
+BENCH_REQUEST = {
+    "method": "GET",
+    "url": "{{base_url}}/body?size={{size}}&latency={{latency}}&chunk={{chunk}}",
+    "headers": "Accept: application/json\nX-Bench-Scenario: {{scenario}}\nX-Bench-Run: {{run_id}}",
+    "body": ""
+}
+
+
+def make_body(size):
+    """Deterministic JSON array of records of about size bytes"""
+    records = []
+    total = 2
+    number = 0
+    while total < size:
+        record = f'{{"id": {number}, "name": "item-{number}", "tags": ["alpha", "beta"], "value": {number}.5}}'
+        records.append(record)
+        total += len(record) + 2
+        number += 1
+    return ("[" + ", ".join(records) + "]").encode("utf-8")
+
+
+class BenchmarkHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately; without TCP_NODELAY small bodies wait for the delayed ACK
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        query = parse_qs(urlsplit(self.path).query)
+
+        def param(name, cast, default):
+            value = query.get(name, [""])[0]
+            return cast(value) if value not in ("", "None") else default
+
+        size = param("size", int, 1024)
+        latency = param("latency", float, 0.0)
+        chunk = param("chunk", int, None)
+        body = self.server.body(size)
+        if latency:
+            time.sleep(latency)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        if chunk:
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for start in range(0, len(body), chunk):
+                piece = body[start:start + chunk]
+                self.wfile.write(f"{len(piece):x}\r\n".encode("ascii") + piece + b"\r\n")
+            self.wfile.write(b"0\r\n\r\n")
+        else:
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class BenchmarkServer(http.server.ThreadingHTTPServer):
+    """
+    Local stand-in HTTP server on a free port. GET /body?size=bytes&latency=seconds&chunk=bytes returns a JSON
+    body of that size after waiting latency seconds, in chunks of chunk bytes (chunked encoding) if given.
+    """
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), BenchmarkHandler)
+        self._bodies = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def body(self, size):
+        with self._lock:
+            if size not in self._bodies:
+                self._bodies[size] = make_body(size)
+            return self._bodies[size]
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def display_cost(preview, repeats=20):
+    """
+    Seconds to replace the contents of a Tk text widget with a preview (median of repeats),
+    or None if Tk cannot open a display.
+    """
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+    except Exception:
+        return None
+    try:
+        root.withdraw()
+        text = tk.Text(root)
+        samples = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            text.delete("1.0", "end")
+            text.insert("1.0", preview)
+            root.update_idletasks()
+            samples.append(time.perf_counter() - start)
+        samples.sort()
+        return samples[len(samples) // 2]
+    finally:
+        root.destroy()
+
+
+def measure_startup(repeats=5):
+    """
+    Seconds a fresh interpreter needs to run each STARTUP_TARGETS snippet (best of repeats), plus the bare
+    interpreter start as "interpreter". A target that fails, or a headless target that imports one of
+    HEADLESS_FORBIDDEN_MODULES, is reported as {"error": text} instead.
+    """
+    folder = os.path.dirname(os.path.abspath(__file__))
+    snippets = {"interpreter": "pass"}
+    for name, code in STARTUP_TARGETS.items():
+        if name != "gui":
+            code += (f"; import sys; loaded = [m for m in {HEADLESS_FORBIDDEN_MODULES!r} if m in sys.modules]; "
+                     f"sys.exit('imports ' + ', '.join(loaded) if loaded else 0)")
+        snippets[name] = code
+    startup = {}
+    for name, code in snippets.items():
+        best = None
+        for _ in range(repeats):
+            start = time.perf_counter()
+            process = subprocess.run([sys.executable, "-c", code], cwd=folder, capture_output=True, text=True)
+            seconds = time.perf_counter() - start
+            if process.returncode != 0:
+                lines = process.stderr.strip().splitlines()
+                best = {"error": lines[-1] if lines else f"exit code {process.returncode}"}
+                break
+            best = seconds if best is None else min(best, seconds)
+        startup[name] = best
+    return startup
+
+
+class BenchmarkRun:
+    """
+    Send BENCH_REQUEST through RequestSender, the send path of the GUI, against a BenchmarkServer and time each stage.
+    A first pass measures stage times and throughput; a short second pass under tracemalloc measures the peak
+    Python heap (tracing slows allocations down, so it is kept out of the timed pass).
+    """
+
+    def __init__(self, server, name, size, latency=0.0, chunk=None, requests=100, concurrency=4):
+        self.server = server
+        self.name = name
+        self.size = size
+        self.latency = latency
+        self.chunk = chunk
+        self.requests = max(1, requests)
+        self.concurrency = max(1, concurrency)
+        self.histograms = {stage: LatencyHistogram() for stage in STAGES}
+        self.errors = 0
+        self.body_bytes = 0
+        self.last_preview = ""
+        self._lock = threading.Lock()
+
+    def _send_one(self, sender, run_id):
+        variables = {"base_url": self.server.base_url, "size": str(self.size), "latency": str(self.latency),
+                     "chunk": str(self.chunk), "scenario": self.name, "run_id": str(run_id)}
+        start = time.perf_counter()
+        prepared = prepare_send(BENCH_REQUEST, variables)
+        substitute = time.perf_counter() - start
+        result = sender.send(BENCH_REQUEST["method"], self.name, prepared, request_key=self.name, timeout=(10, 60))
+        return dict(result["stages"], substitute=substitute), result
+
+    def _run_pass(self, count, record):
+        folder = tempfile.mkdtemp(prefix="ez-bench-")
+        history_store = HistoryStore(folder)
+        session_pool = SessionPool.from_settings({}, min_pool_size=self.concurrency)
+        sender = RequestSender(session_pool, history_store)
+        counter = iter(range(count))
+        counter_lock = threading.Lock()
+
+        def worker():
+            while True:
+                with counter_lock:
+                    run_id = next(counter, None)
+                if run_id is None:
+                    return
+                try:
+                    durations, result = self._send_one(sender, run_id)
+                except Exception:
+                    with self._lock:
+                        self.errors += 1
+                    continue
+                if record:
+                    with self._lock:
+                        if result["status"] != 200:
+                            self.errors += 1
+                            continue
+                        for stage, seconds in durations.items():
+                            self.histograms[stage].record(seconds)
+                        self.body_bytes += result["bytes"]
+                        self.last_preview = result["display"]
+
+        try:
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+                for _ in range(self.concurrency):
+                    executor.submit(worker)
+            return time.perf_counter() - start
+        finally:
+            session_pool.close()
+            history_store.close()
+            shutil.rmtree(folder, ignore_errors=True)
+
+    def run(self, measure_memory=True, measure_display=True):
+        """Run the scenario and return its result dict (stage times in seconds)"""
+        # Warm up: connections, the server's body cache and lazy imports are not part of the measurement
+        self._run_pass(min(self.requests, self.concurrency), record=False)
+        wall_time = self._run_pass(self.requests, record=True)
+        peak_memory = None
+        if measure_memory:
+            tracemalloc.start()
+            try:
+                tracemalloc.reset_peak()
+                self._run_pass(min(self.requests, self.concurrency * 2), record=False)
+                peak_memory = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+        stages = {stage: self._stage_summary(self.histograms[stage]) for stage in STAGES}
+        if measure_display:
+            seconds = display_cost(self.last_preview)
+            stages["display"] = None if seconds is None else {"mean": seconds, "p50": seconds, "p90": seconds, "max": seconds}
+        completed = self.histograms["send"].count
+        return {
+            "size": self.size,
+            "latency": self.latency,
+            "chunk": self.chunk,
+            "requests": completed,
+            "concurrency": self.concurrency,
+            "errors": self.errors,
+            "wall_time": round(wall_time, 6),
+            "throughput": round(completed / wall_time, 3) if wall_time > 0 else None,
+            "bytes_per_second": round(self.body_bytes / wall_time, 1) if wall_time > 0 else None,
+            "peak_memory": peak_memory,
+            "stages": stages
+        }
+
+    @staticmethod
+    def _stage_summary(histogram):
+        if not histogram.count:
+            return None
+        summary = histogram.summary()
+        return {key: summary[key] for key in ("mean", "p50", "p90", "max")}
+
+
+def run_benchmarks(scenarios, measure_memory=True, measure_display=True, measure_startup_time=True, on_result=None):
+    """Run {name: scenario parameters} against a fresh BenchmarkServer and return the report dict"""
+    startup = measure_startup() if measure_startup_time else None
+    if startup is not None and on_result is not None:
+        on_result("startup", startup)
+    server = BenchmarkServer().start()
+    results = {}
+    try:
+        for name, scenario in scenarios.items():
+            run = BenchmarkRun(server, name, scenario["size"], scenario.get("latency", 0.0), scenario.get("chunk"),
+                               scenario.get("requests", 100), scenario.get("concurrency", 4))
+            results[name] = run.run(measure_memory, measure_display)
+            if on_result is not None:
+                on_result(name, results[name])
+    finally:
+        server.stop()
+    return {
+        "version": BASELINE_VERSION,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "startup": startup,
+        "scenarios": results
+    }
+
+
+def compare(report, baseline, tolerance=0.25):
+    """
+    List regressions of a report against a baseline report: stage medians, throughput and peak memory of
+    scenarios present in both that are worse by more than tolerance (a fraction, e.g. 0.25 = 25%), and
+    scenarios with more failed requests than in the baseline (any, if the baseline lacks the scenario).
+    """
+    regressions = []
+    for name, seconds in (report.get("startup") or {}).items():
+        base = (baseline.get("startup") or {}).get(name)
+        if isinstance(seconds, dict):
+            regressions.append(f"startup {name}: {seconds['error']}")
+        elif isinstance(base, float) and seconds > base * (1 + tolerance) + MIN_STARTUP_REGRESSION:
+            regressions.append(f"startup {name}: {seconds * 1000:.0f} ms (baseline {base * 1000:.0f} ms)")
+    for name, result in report["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        # Failed requests have no stage timings, so they would otherwise go unnoticed
+        base_errors = base["errors"] if base is not None else 0
+        if result["errors"] > base_errors:
+            regressions.append(f"{name}: {result['errors']} failed requests (baseline {base_errors})")
+        if base is None:
+            continue
+        for stage, summary in result["stages"].items():
+            base_summary = base["stages"].get(stage)
+            if summary is None or base_summary is None:
+                continue
+            if summary["p50"] > base_summary["p50"] * (1 + tolerance) + MIN_STAGE_REGRESSION:
+                regressions.append(f"{name}: {STAGE_LABELS[stage]} p50 {summary['p50'] * 1000:.2f} ms "
+                                   f"(baseline {base_summary['p50'] * 1000:.2f} ms)")
+        if result["throughput"] and base["throughput"] and result["throughput"] < base["throughput"] / (1 + tolerance):
+            regressions.append(f"{name}: throughput {result['throughput']:.1f} req/s "
+                               f"(baseline {base['throughput']:.1f} req/s)")
+        if result["peak_memory"] is not None and base["peak_memory"] is not None and \
+                result["peak_memory"] > base["peak_memory"] * (1 + tolerance) + MIN_MEMORY_REGRESSION:
+            regressions.append(f"{name}: peak memory {format_bytes(result['peak_memory'])} "
+                               f"(baseline {format_bytes(base['peak_memory'])})")
+    return regressions
+
+
+def format_startup(startup):
+    """One-line text of measure_startup() results, e.g. Startup: interpreter 15 ms | core 32 ms | ..."""
+    def text(value):
+        return value["error"] if isinstance(value, dict) else f"{value * 1000:.0f} ms"
+
+    return "Startup: " + " | ".join(f"{name} {text(value)}" for name, value in startup.items())
+
+
+def format_result(name, result):
+    """Human-readable multi-line text of one scenario result (or of the startup times for name "startup")"""
+    if name == "startup":
+        return format_startup(result)
+    lines = [
+        f"{name}: {format_bytes(result['size'])} body"
+        + (f", {result['latency'] * 1000:.0f} ms latency" if result["latency"] else "")
+        + (f", {format_bytes(result['chunk'])} chunks" if result["chunk"] else "")
+        + f", {result['requests']} requests x {result['concurrency']} concurrent",
+        f"  Throughput: {result['throughput'] or 0:.1f} req/s | {format_bytes(result['bytes_per_second'] or 0)}/s | "
+        f"Errors: {result['errors']}"
+        + (f" | Peak memory: {format_bytes(result['peak_memory'])}" if result["peak_memory"] is not None else "")
+    ]
+    for stage, summary in result["stages"].items():
+        if summary is None:
+            lines.append(f"  {STAGE_LABELS[stage]:<11} -")
+        else:
+            lines.append(f"  {STAGE_LABELS[stage]:<11} mean {format_ms(summary['mean'], 2, '')} | "
+                         f"p50 {format_ms(summary['p50'], 2, '')} | p90 {format_ms(summary['p90'], 2, '')} | "
+                         f"max {format_ms(summary['max'], 2)}")
+    return "\n".join(lines)
+
+
+def load_baseline(path):
+    with open(path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("version") != BASELINE_VERSION:
+        print(f"Baseline {path} was written by another benchmark version; results may not be comparable",
+              file=sys.stderr)
+    return baseline
@@ -0,0 +1,181 @@
+import gzip
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+
+# Optional zstd compression (pip install zstandard); gzip is used without it
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+ZSTD_LEVEL = 3
+GZIP_LEVEL = 1  # Bodies are compressed while they download, so favour speed; JSON and HTML still shrink well
+EXTENSIONS = {"zstd": ".zst", "gzip": ".gz"}
+
+
+def default_codec():
+    return "zstd" if zstandard is not None else "gzip"
+
+
+class BlobWriter:
+    """
+    Text file-like object that hashes and compresses what is written into a temporary file.
+    After close(), digest and size (uncompressed bytes) are set; BlobStore.commit() moves the file into place.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.codec = store.codec
+        fd, self.temp_path = tempfile.mkstemp(dir=store.temp_folder, suffix=EXTENSIONS[self.codec])
+        self._raw = os.fdopen(fd, "wb")
+        if self.codec == "zstd":
+            self._stream = zstandard.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(self._raw)
+        else:
+            self._stream = gzip.GzipFile(fileobj=self._raw, mode="wb", compresslevel=GZIP_LEVEL, mtime=0)
+        self._hash = hashlib.sha256()
+        self.size = 0
+        self.digest = None
+
+    def write(self, text):
+        data = text.encode("utf-8")
+        self._hash.update(data)
+        self._stream.write(data)
+        self.size += len(data)
+        return len(text)
+
+    def close(self):
+        if self.digest is not None:
+            return
+        self._stream.close()
+        if not self._raw.closed:
+            self._raw.close()
+        self.digest = self._hash.hexdigest()
+
+    def discard(self):
+        self.close()
+        if os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+
+
+class ImportedBlob:
+    """
+    Closed BlobWriter stand-in for a blob taken over from another BlobStore: the compressed file is hard-linked
+    (or copied, where links are not possible) into the temporary folder, so it is neither decompressed nor hashed again.
+    """
+
+    def __init__(self, store, source_path, digest, codec, size):
+        self.store = store
+        self.codec = codec
+        self.digest = digest
+        self.size = size
+        fd, self.temp_path = tempfile.mkstemp(dir=store.temp_folder, suffix=EXTENSIONS[codec])
+        os.close(fd)
+        os.remove(self.temp_path)
+        try:
+            os.link(source_path, self.temp_path)
+        except OSError:
+            shutil.copyfile(source_path, self.temp_path)
+
+    def close(self):
+        pass
+
+    def discard(self):
+        if os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+
+
+class BlobStore:
+    """
+    Content-addressed store of compressed texts: each distinct content is kept once, in
+    blobs/<first two hex digits>/<sha256>.<zst|gz>. Which blobs exist (and their codec and sizes) is
+    tracked by the caller; this class only handles the files.
+    Decompressed copies for memory-mapped viewing are kept under cache/ and can be dropped at any time.
+    """
+
+    def __init__(self, folder, codec=None):
+        self.folder = folder
+        self.codec = codec or default_codec()
+        self.temp_folder = os.path.join(folder, "tmp")
+        self.cache_folder = os.path.join(folder, "cache")
+        os.makedirs(self.temp_folder, exist_ok=True)
+        os.makedirs(self.cache_folder, exist_ok=True)
+
+    def path(self, digest, codec):
+        return os.path.join(self.folder, digest[:2], digest + EXTENSIONS[codec])
+
+    def writer(self):
+        """Start writing a new blob (see BlobWriter)"""
+        return BlobWriter(self)
+
+    def write_text(self, text):
+        """Compress a text into a finished (not yet committed) BlobWriter"""
+        writer = self.writer()
+        writer.write(text)
+        writer.close()
+        return writer
+
+    def import_blob(self, source, digest, codec, size):
+        """Take over a blob of another BlobStore as a closed writer to commit() (see ImportedBlob)"""
+        return ImportedBlob(self, source.path(digest, codec), digest, codec, size)
+
+    def commit(self, writer, exists):
+        """
+        Move a closed writer's file into place and return its compressed size.
+        If exists is True (the content is already stored) the new copy is discarded instead and None is returned.
+        """
+        if exists:
+            writer.discard()
+            return None
+        final_path = self.path(writer.digest, writer.codec)
+        os.makedirs(os.path.dirname(final_path), exist_ok=True)
+        os.replace(writer.temp_path, final_path)
+        return os.path.getsize(final_path)
+
+    def open(self, digest, codec):
+        """Open a blob for reading its decompressed bytes"""
+        if codec == "zstd":
+            if zstandard is None:
+                raise RuntimeError("The zstandard package is required to read this body")
+            return zstandard.ZstdDecompressor().stream_reader(open(self.path(digest, codec), "rb"), closefd=True)
+        return gzip.open(self.path(digest, codec), "rb")
+
+    def read_text(self, digest, codec, limit=None):
+        """Decompressed text of a blob; with limit, only about its first limit characters"""
+        with self.open(digest, codec) as f:
+            if limit is None:
+                return f.read().decode("utf-8", errors="replace")
+            return f.read(limit * 4).decode("utf-8", errors="ignore")[:limit]
+
+    def cache_path(self, digest):
+        return os.path.join(self.cache_folder, digest + ".txt")
+
+    def materialize(self, digest, codec):
+        """Path of a decompressed copy of a blob (created on first use), e.g. to memory-map it"""
+        path = self.cache_path(digest)
+        if not os.path.exists(path):
+            fd, temp_path = tempfile.mkstemp(dir=self.temp_folder, suffix=".txt")
+            with os.fdopen(fd, "wb") as out, self.open(digest, codec) as f:
+                shutil.copyfileobj(f, out, 1024 * 1024)
+            os.replace(temp_path, path)
+        return path
+
+    def delete(self, digest, codec):
+        for path in (self.path(digest, codec), self.cache_path(digest)):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def clear_temporary(self, max_age=86400, now=None):
+        """Remove leftover temporary files and decompressed copies not used for max_age seconds"""
+        now = time.time() if now is None else now
+        for folder in (self.temp_folder, self.cache_folder):
+            for name in os.listdir(folder):
+                path = os.path.join(folder, name)
+                try:
+                    stat = os.stat(path)
+                    if now - max(stat.st_atime, stat.st_mtime) > max_age:
+                        os.remove(path)
+                except OSError:
+                    pass
@@ -0,0 +1,194 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from batch_runner import new_result, run_saved_request
+from extractors import parse_extractors, run_extractors
+from variables import compile_request
+
+
+def build_chain(saved_requests, targets):
+    """
+    Return {index: set of indices it depends on} for the target request indices and everything they need.
+    A request depends on the requests named in its "depends_on" list (by id or description) and on every
+    request whose extractors produce a variable it uses. Raises ValueError for unknown names, ambiguous
+    producers and cycles.
+    """
+    by_name = {}
+    for index, req in enumerate(saved_requests):
+        for name in (req.get("id"), req.get("description")):
+            if name:
+                by_name.setdefault(name, []).append(index)
+    producers = {}
+    for index, req in enumerate(saved_requests):
+        for extractor in parse_extractors(req.get("extract", "")):
+            producers.setdefault(extractor["variable"], set()).add(index)
+
+    def dependencies(index):
+        req = saved_requests[index]
+        explicit = set()
+        for name in req.get("depends_on", []):
+            matches = by_name.get(name, [])
+            if len(matches) != 1:
+                raise ValueError(f"Request {index}: depends_on '{name}' matches {len(matches)} requests")
+            explicit.add(matches[0])
+        deps = set(explicit)
+        for variable in compile_request(req).variables:
+            candidates = producers.get(variable, set()) - {index}
+            if len(candidates) > 1 and not candidates & explicit:
+                raise ValueError(f"Request {index}: variable {variable} is extracted by several requests; "
+                                 f"declare which one in depends_on")
+            deps |= candidates & explicit if len(candidates) > 1 else candidates
+        return deps
+
+    graph = {}
+    todo = list(targets)
+    while todo:
+        index = todo.pop()
+        if index in graph:
+            continue
+        graph[index] = dependencies(index)
+        todo.extend(graph[index])
+
+    # Kahn's algorithm: whatever cannot be ordered is part of a cycle
+    remaining = {index: len(deps) for index, deps in graph.items()}
+    ready = [index for index, count in remaining.items() if count == 0]
+    dependents = {index: [] for index in graph}
+    for index, deps in graph.items():
+        for dep in deps:
+            dependents[dep].append(index)
+    ordered = 0
+    while ready:
+        index = ready.pop()
+        ordered += 1
+        for dependent in dependents[index]:
+            remaining[dependent] -= 1
+            if remaining[dependent] == 0:
+                ready.append(dependent)
+    if ordered != len(graph):
+        cycle = sorted(index for index, count in remaining.items() if count > 0)
+        raise ValueError(f"Dependency cycle between requests {cycle}")
+    return graph
+
+
+class ChainRun:
+    """
+    Run a dependency graph from build_chain: every request starts as soon as all requests it depends on
+    have succeeded, so independent branches run concurrently (up to concurrency at a time).
+    A request sees the global variables plus everything extracted by the requests it (transitively)
+    depends on. If a request fails, its dependents are skipped. Results are written as JSON lines.
+    If recording a result or starting the next requests fails (e.g. the output is a closed pipe), the run stops
+    and run() raises that error.
+    """
+
+    def __init__(self, session_pool, saved_requests, graph, variable_dict, settings, output, concurrency=8, timeout=None):
+        self.session_pool = session_pool
+        self.saved_requests = saved_requests
+        self.graph = graph
+        self.variable_dict = variable_dict
+        self.settings = settings
+        self.output = output
+        self.concurrency = max(1, concurrency)
+        self.timeout = timeout
+
+        self.dependents = {index: [] for index in graph}
+        for index, deps in graph.items():
+            for dep in deps:
+                self.dependents[dep].append(index)
+        self.summary = {"total": len(graph), "ok": 0, "failed": 0, "skipped": 0, "wall_time": None}
+        self._variables_out = {}  # index -> variables after the request ran (inputs plus its extractions)
+        self._waiting = {index: len(deps) for index, deps in graph.items()}
+        self._lock = threading.Lock()
+        self._finished = threading.Event()
+        self._done_count = 0
+        self._error = None  # Exception that stopped the run
+
+    def _record(self, result):
+        """Write one result; called with the lock held"""
+        if result["ok"]:
+            self.summary["ok"] += 1
+        elif result["error"] and result["error"].startswith("Skipped"):
+            self.summary["skipped"] += 1
+        else:
+            self.summary["failed"] += 1
+        self.output.write(json.dumps(result, ensure_ascii=False) + "\n")
+        self.output.flush()
+        self._done_count += 1
+        if self._done_count == len(self.graph):
+            self._finished.set()
+
+    def _skip(self, index, failed_index):
+        """Record index (and, recursively, its dependents) as skipped; called with the lock held"""
+        if self._waiting.get(index) is None:
+            return
+        self._waiting[index] = None
+        result = new_result(index, self.saved_requests[index])
+        result["error"] = f"Skipped: request {failed_index} it depends on failed"
+        self._record(result)
+        for dependent in self.dependents[index]:
+            self._skip(dependent, failed_index)
+
+    def _variables_for(self, index):
+        variables = dict(self.variable_dict)
+        for dep in sorted(self.graph[index]):
+            variables.update(self._variables_out[dep])
+        return variables
+
+    def _run_one(self, executor, index):
+        req = self.saved_requests[index]
+        variables = self._variables_for(index)
+        extractors = parse_extractors(req.get("extract", ""))
+        extracted = {}
+
+        def on_response(response, content):
+            if extractors:
+                text = content.decode(response.encoding or "utf-8", errors="replace")
+                extracted.update(run_extractors(extractors, text, response.headers, variables))
+
+        try:
+            result = run_saved_request(self.session_pool, index, req, variables, self.timeout, self.settings, on_response)
+        except Exception as e:
+            # Never leave the graph waiting for a request that crashed
+            result = new_result(index, req)
+            result["error"] = f"{type(e).__name__}: {e}"
+        result["extracted"] = sorted(extracted)
+        with self._lock:
+            if self._error is not None:
+                return
+            try:
+                self._record(result)
+                if not result["ok"]:
+                    for dependent in self.dependents[index]:
+                        self._skip(dependent, index)
+                    return
+                variables.update(extracted)
+                self._variables_out[index] = variables
+                for dependent in self.dependents[index]:
+                    if self._waiting.get(dependent) is None:
+                        continue
+                    self._waiting[dependent] -= 1
+                    if self._waiting[dependent] == 0:
+                        self._waiting[dependent] = None
+                        executor.submit(self._run_one, executor, dependent)
+            except Exception as e:
+                # Stop instead of leaving run() waiting for requests that will never be recorded
+                self._error = e
+                self._finished.set()
+
+    def run(self):
+        """Run the whole graph in the calling thread and return the summary dict"""
+        start_time = time.perf_counter()
+        if self.graph:
+            with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+                with self._lock:
+                    ready = [index for index, count in self._waiting.items() if count == 0]
+                    for index in ready:
+                        self._waiting[index] = None
+                for index in sorted(ready):
+                    executor.submit(self._run_one, executor, index)
+                self._finished.wait()
+        self.summary["wall_time"] = round(time.perf_counter() - start_time, 6)
+        if self._error is not None:
+            raise self._error
+        return self.summary
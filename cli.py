@@ -0,0 +1,249 @@
+import argparse
+import json
+import sys
+
+from http_client import SessionPool, prepare_request, request_timeout
+from request_store import load_request_file
+from variables import compile_request, UndefinedVariableError
+
+
+def run_command(args):
+    """Headless "run" command: send saved requests concurrently and stream results as JSONL"""
+    from batch_runner import select_requests, run_batch, print_summary
+
+    data = load_request_file(args.file)
+    try:
+        selected = select_requests(data["requests"], indices=args.index, match=args.match, methods=args.method)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+    # Report undefined variables up front; those requests are recorded as errors without being sent
+    for index, req in selected:
+        undefined = compile_request(req).undefined(data["global_variables"])
+        if undefined:
+            print(f"Request {index}: undefined variable(s): {', '.join(undefined)}", file=sys.stderr)
+    if args.output == "-":
+        summary = run_batch(selected, data["global_variables"], data["settings"], sys.stdout,
+                            concurrency=args.concurrency, timeout=args.timeout)
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            summary = run_batch(selected, data["global_variables"], data["settings"], f,
+                                concurrency=args.concurrency, timeout=args.timeout)
+    print_summary(summary)
+    return 0 if summary["failed"] == 0 else 1
+
+
+def load_command(args):
+    """Headless "load" command: load test one saved request and print the report as JSON"""
+    from load_test import LoadTest, format_report
+
+    data = load_request_file(args.file)
+    if not 0 <= args.index < len(data["requests"]):
+        print(f"No saved request at index {args.index}", file=sys.stderr)
+        return 2
+    req = data["requests"][args.index]
+    try:
+        url, headers, send_kwargs = prepare_request(req, data["global_variables"])
+    except UndefinedVariableError as e:
+        print(f"Undefined variable: {e.args[0]}", file=sys.stderr)
+        return 2
+    session_pool = SessionPool.from_settings(data["settings"], min_pool_size=args.concurrency)
+    try:
+        test = LoadTest(session_pool, req.get("method", "GET"), url, headers, send_kwargs,
+                        total=args.requests, duration=args.duration, rps=args.rps,
+                        concurrency=args.concurrency,
+                        timeout=args.timeout if args.timeout is not None else request_timeout(req, data["settings"]))
+        report = test.run()
+    except ValueError as e:
+        print(f"Load test error: {e}", file=sys.stderr)
+        return 2
+    finally:
+        session_pool.close()
+    print(format_report(report), file=sys.stderr)
+    report_json = json.dumps(report, ensure_ascii=False, indent=4)
+    if args.output == "-":
+        print(report_json)
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(report_json + "\n")
+    return 0 if not report["errors"] else 1
+
+
+def data_command(args):
+    """Headless "data" command: send one saved request once per dataset row and stream results as JSONL"""
+    from dataset_runner import DatasetRun, iter_dataset, format_summary
+
+    data = load_request_file(args.file)
+    if not 0 <= args.index < len(data["requests"]):
+        print(f"No saved request at index {args.index}", file=sys.stderr)
+        return 2
+    req = data["requests"][args.index]
+    dataset = args.dataset or req.get("dataset")
+    if not dataset:
+        print("No dataset given and none attached to the request (use --dataset)", file=sys.stderr)
+        return 2
+    session_pool = SessionPool.from_settings(data["settings"], min_pool_size=args.concurrency)
+    output = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        run = DatasetRun(session_pool, args.index, req, iter_dataset(dataset), data["global_variables"],
+                         data["settings"], output, concurrency=args.concurrency, timeout=args.timeout)
+        summary = run.run()
+    except (OSError, ValueError) as e:
+        print(f"Dataset error: {e}", file=sys.stderr)
+        return 2
+    finally:
+        session_pool.close()
+        if output is not sys.stdout:
+            output.close()
+    print(format_summary(summary), file=sys.stderr)
+    return 0 if summary["failed"] == 0 else 1
+
+
+def chain_command(args):
+    """Headless "chain" command: run saved requests with their dependencies, passing extracted variables along"""
+    from batch_runner import select_requests, print_summary
+    from chain_runner import ChainRun, build_chain
+
+    data = load_request_file(args.file)
+    try:
+        selected = select_requests(data["requests"], indices=args.index, match=args.match, methods=args.method)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+    try:
+        graph = build_chain(data["requests"], [index for index, _ in selected])
+    except ValueError as e:
+        print(f"Chain error: {e}", file=sys.stderr)
+        return 2
+    session_pool = SessionPool.from_settings(data["settings"], min_pool_size=args.concurrency)
+    output = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        summary = ChainRun(session_pool, data["requests"], graph, data["global_variables"], data["settings"],
+                           output, concurrency=args.concurrency, timeout=args.timeout).run()
+    except Exception as e:
+        # The run stopped because a result could not be recorded (e.g. the output pipe was closed)
+        print(f"Chain error: {type(e).__name__}: {e}", file=sys.stderr)
+        return 2
+    finally:
+        session_pool.close()
+        if output is not sys.stdout:
+            output.close()
+    print_summary(summary)
+    return 0 if summary["failed"] == 0 and summary["skipped"] == 0 else 1
+
+
+def bench_command(args):
+    """Headless "bench" command: time startup and the send pipeline against a local server and compare with a baseline"""
+    from benchmark import SCENARIOS, run_benchmarks, compare, format_result, load_baseline
+
+    if args.size is not None:
+        scenarios = {"custom": {"size": args.size, "latency": args.latency, "chunk": args.chunk,
+                                "requests": 100, "concurrency": 4}}
+    else:
+        scenarios = {name: dict(SCENARIOS[name]) for name in (args.scenario or SCENARIOS)}
+    for scenario in scenarios.values():
+        if args.requests is not None:
+            scenario["requests"] = args.requests
+        if args.concurrency is not None:
+            scenario["concurrency"] = args.concurrency
+    baseline = load_baseline(args.baseline) if args.baseline else None
+    report = run_benchmarks(scenarios, measure_memory=not args.no_memory, measure_display=not args.no_display,
+                            measure_startup_time=not args.no_startup, on_result=lambda name, result: print(format_result(name, result), file=sys.stderr))
+    report_json = json.dumps(report, ensure_ascii=False, indent=4)
+    if args.output == "-":
+        print(report_json)
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(report_json + "\n")
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            f.write(report_json + "\n")
+    if baseline is None:
+        return 0
+    regressions = compare(report, baseline, args.tolerance)
+    for regression in regressions:
+        print(f"Regression: {regression}", file=sys.stderr)
+    if not regressions:
+        print("No regressions against the baseline", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+def scenario_name(name):
+    """argparse type of bench --scenario: a key of benchmark.SCENARIOS (imported only when the option is used)"""
+    from benchmark import SCENARIOS
+
+    if name not in SCENARIOS:
+        raise argparse.ArgumentTypeError(f"invalid choice: {name!r} (choose from {', '.join(SCENARIOS)})")
+    return name
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(description="EZ-HTTPRequestChecker. Starts the GUI when no command is given.")
+    subparsers = parser.add_subparsers(dest="command")
+
+    run_parser = subparsers.add_parser("run", help="Send saved requests without the GUI and write results as JSONL")
+    run_parser.add_argument("--file", default="saved_requests.json", help="Saved requests file (default: saved_requests.json)")
+    run_parser.add_argument("--index", type=int, nargs="+", help="Only run requests at these list positions (0-based)")
+    run_parser.add_argument("--match", help="Only run requests whose description or URL matches this regex")
+    run_parser.add_argument("--method", nargs="+", help="Only run requests with these HTTP methods")
+    run_parser.add_argument("--concurrency", type=int, default=8, help="Max requests in flight (default: 8)")
+    run_parser.add_argument("--timeout", type=float, default=None, help="Per-request timeout in seconds (default: each request's connect/read timeouts)")
+    run_parser.add_argument("--output", default="-", help="JSONL output file, '-' for stdout (default)")
+    run_parser.set_defaults(handler=run_command)
+
+    load_parser = subparsers.add_parser("load", help="Load test one saved request and report latency percentiles as JSON")
+    load_parser.add_argument("index", type=int, help="List position (0-based) of the saved request")
+    load_parser.add_argument("--file", default="saved_requests.json", help="Saved requests file (default: saved_requests.json)")
+    load_parser.add_argument("--requests", type=int, help="Total number of requests to send")
+    load_parser.add_argument("--duration", type=float, help="Run for this many seconds")
+    load_parser.add_argument("--rps", type=float, help="Target requests per second (open loop); omit for closed loop")
+    load_parser.add_argument("--concurrency", type=int, default=10, help="Closed loop: workers; open loop: max in flight (default: 10)")
+    load_parser.add_argument("--timeout", type=float, default=None, help="Per-request timeout in seconds (default: the request's connect/read timeouts)")
+    load_parser.add_argument("--output", default="-", help="JSON report file, '-' for stdout (default)")
+    load_parser.set_defaults(handler=load_command)
+
+    data_parser = subparsers.add_parser("data", help="Send one saved request once per row of a CSV/JSONL dataset")
+    data_parser.add_argument("index", type=int, help="List position (0-based) of the saved request")
+    data_parser.add_argument("--dataset", help="CSV, TSV or JSONL file (default: the dataset attached to the request)")
+    data_parser.add_argument("--file", default="saved_requests.json", help="Saved requests file (default: saved_requests.json)")
+    data_parser.add_argument("--concurrency", type=int, default=8, help="Max requests in flight (default: 8)")
+    data_parser.add_argument("--timeout", type=float, default=None, help="Per-request timeout in seconds (default: the request's connect/read timeouts)")
+    data_parser.add_argument("--output", default="-", help="JSONL output file, '-' for stdout (default)")
+    data_parser.set_defaults(handler=data_command)
+
+    chain_parser = subparsers.add_parser("chain", help="Run saved requests and their dependencies, passing extracted variables along")
+    chain_parser.add_argument("--file", default="saved_requests.json", help="Saved requests file (default: saved_requests.json)")
+    chain_parser.add_argument("--index", type=int, nargs="+", help="Only run these requests (0-based) and what they depend on")
+    chain_parser.add_argument("--match", help="Only run requests whose description or URL matches this regex, and what they depend on")
+    chain_parser.add_argument("--method", nargs="+", help="Only run requests with these HTTP methods, and what they depend on")
+    chain_parser.add_argument("--concurrency", type=int, default=8, help="Max requests in flight (default: 8)")
+    chain_parser.add_argument("--timeout", type=float, default=None, help="Per-request timeout in seconds (default: each request's connect/read timeouts)")
+    chain_parser.add_argument("--output", default="-", help="JSONL output file, '-' for stdout (default)")
+    chain_parser.set_defaults(handler=chain_command)
+
+    bench_parser = subparsers.add_parser("bench", help="Benchmark the send pipeline against a local stand-in server")
+    bench_parser.add_argument("--scenario", nargs="+", type=scenario_name, metavar="NAME",
+                              help="Built-in scenarios to run (default: all; an unknown name lists them)")
+    bench_parser.add_argument("--size", type=int, help="Run one custom scenario with this body size in bytes instead")
+    bench_parser.add_argument("--latency", type=float, default=0.0, help="Custom scenario: server latency in seconds (default: 0)")
+    bench_parser.add_argument("--chunk", type=int, help="Custom scenario: send the body chunked in pieces of this many bytes")
+    bench_parser.add_argument("--requests", type=int, help="Requests per scenario (default: per scenario)")
+    bench_parser.add_argument("--concurrency", type=int, help="Requests in flight (default: per scenario)")
+    bench_parser.add_argument("--no-memory", action="store_true", help="Skip the peak memory pass")
+    bench_parser.add_argument("--no-display", action="store_true", help="Skip timing the Tk text widget update")
+    bench_parser.add_argument("--no-startup", action="store_true", help="Skip timing the imports of the core, CLI and GUI")
+    bench_parser.add_argument("--baseline", help="Baseline JSON to compare with; exits with 1 on regressions")
+    bench_parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown against the baseline (default: 0.25 = 25%%)")
+    bench_parser.add_argument("--save-baseline", help="Also write the report to this file, to compare later runs with")
+    bench_parser.add_argument("--output", default="-", help="JSON report file, '-' for stdout (default)")
+    bench_parser.set_defaults(handler=bench_command)
+    return parser
+
+
+if __name__ == "__main__":
+    args = build_arg_parser().parse_args()
+    if args.command:
+        sys.exit(args.handler(args))
+    from main import run_app
+
+    run_app()
@@ -0,0 +1,71 @@
+"""
+GUI-free core of EZ-HTTPRequestChecker: the request model, variable engine, sender and history store that the
+window (main.py) and the command line (cli.py) are built on. Importing this module loads nothing else; each name
+is imported from its module on first use, so scripts and worker processes only pay for what they touch
+(requests/urllib3, the slowest imports, are loaded with the first connection).
+
+    import core
+
+    data = core.load_request_file("saved_requests.json")
+    pool = core.SessionPool.from_settings(data["settings"])
+    history = core.HistoryStore("history")
+    sender = core.RequestSender(pool, history)
+    prepared = core.prepare_send(data["requests"][0], data["global_variables"])
+    result = sender.send("GET", "example", prepared)
+"""
+import importlib
+
+# Public name -> module that defines it
+EXPORTS = {
+    # Request model: saved requests file, ids and search
+    "load_request_file": "request_store",
+    "save_request_file": "request_store",
+    "RequestFileWriter": "request_store",
+    "RequestIndex": "request_store",
+    "ensure_request_ids": "request_store",
+    "new_request_id": "request_store",
+    # Variable engine
+    "compile_request": "variables",
+    "substitute_variables": "variables",
+    "find_undefined_variables": "variables",
+    "UndefinedVariableError": "variables",
+    # Sending
+    "DEFAULT_SETTINGS": "http_client",
+    "SessionPool": "http_client",
+    "prepare_send": "http_client",
+    "prepare_request": "http_client",
+    "request_timeout": "http_client",
+    "format_timings": "http_client",
+    "SendCancelled": "http_client",
+    "RequestSender": "sender",
+    "parse_extractors": "extractors",
+    "run_extractors": "extractors",
+    "ExtractionError": "extractors",
+    # History and response cache
+    "DEFAULT_HISTORY_SETTINGS": "history_store",
+    "HistoryStore": "history_store",
+    "DEFAULT_CACHE_SETTINGS": "response_cache",
+    "ResponseCache": "response_cache",
+    # Headless runners
+    "run_saved_request": "batch_runner",
+    "run_batch": "batch_runner",
+    "DatasetRun": "dataset_runner",
+    "build_chain": "chain_runner",
+    "ChainRun": "chain_runner",
+    "LoadTest": "load_test"
+}
+
+__all__ = list(EXPORTS)
+
+
+def __getattr__(name):
+    module_name = EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value  # Later lookups do not go through __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(EXPORTS))
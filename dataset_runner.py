@@ -0,0 +1,153 @@
+import csv
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from batch_runner import run_saved_request
+from load_test import LatencyHistogram, format_outcome
+
+DATASET_EXTENSIONS = (".csv", ".tsv", ".jsonl", ".ndjson")
+
+
+def iter_dataset(path):
+    """
+    Yield (row number, {variable: value}) for each row of a CSV/TSV file (header row = variable names)
+    or a JSONL file (one JSON object per line). Rows are read one at a time, so files of any size work.
+    Non-string JSON values are passed as JSON text (e.g. true, 12, {"a": 1}).
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in DATASET_EXTENSIONS:
+        raise ValueError(f"Unsupported dataset file type: {extension or path} (use CSV, TSV or JSONL)")
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        if extension in (".csv", ".tsv"):
+            reader = csv.DictReader(f, delimiter="\t" if extension == ".tsv" else ",")
+            for number, row in enumerate(reader, 1):
+                yield number, {key: value for key, value in row.items() if key}
+            return
+        number = 0
+        for line in f:
+            if not line.strip():
+                continue
+            number += 1
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                raise ValueError(f"Row {number} of {path} is not valid JSON: {e}") from None
+            if not isinstance(row, dict):
+                raise ValueError(f"Row {number} of {path} is not a JSON object")
+            yield number, {key: value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+                           for key, value in row.items()}
+
+
+class DatasetRun:
+    """
+    Send one saved request once per dataset row, with the row's values bound to {{variables}}
+    (row values override global variables of the same name).
+    Rows are pulled from the iterator only as workers become free, so at most about 2 * concurrency rows
+    are held in memory. Each result is written to output as one JSON line as soon as it completes.
+    """
+
+    def __init__(self, session_pool, index, req, rows, variable_dict, settings, output, concurrency=8, timeout=None):
+        self.session_pool = session_pool
+        self.index = index
+        self.req = req
+        self.rows = rows
+        self.variable_dict = variable_dict
+        self.settings = settings
+        self.output = output
+        self.concurrency = max(1, concurrency)
+        self.timeout = timeout
+
+        self.latency = LatencyHistogram()
+        self.status_counts = {}
+        self.error_counts = {}
+        self.completed = 0
+        self.ok = 0
+        self.failed = 0
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._start_time = None
+        self._end_time = None
+
+    def stop(self):
+        """Stop after the rows already in flight"""
+        self._stop_event.set()
+
+    def elapsed(self):
+        if self._start_time is None:
+            return 0.0
+        return (self._end_time or time.perf_counter()) - self._start_time
+
+    def _run_row(self, number, row):
+        variables = dict(self.variable_dict)
+        variables.update(row)
+        result = run_saved_request(self.session_pool, self.index, self.req, variables, self.timeout, self.settings)
+        result["row"] = number
+        with self._lock:
+            self.completed += 1
+            if result["ok"]:
+                self.ok += 1
+            else:
+                self.failed += 1
+            if result["elapsed"] is not None:
+                self.latency.record(result["elapsed"])
+            if result["status"] is not None:
+                self.status_counts[result["status"]] = self.status_counts.get(result["status"], 0) + 1
+            if result["error"] is not None:
+                error = result["error"].split(":", 1)[0]
+                self.error_counts[error] = self.error_counts.get(error, 0) + 1
+            self.output.write(json.dumps(result, ensure_ascii=False) + "\n")
+            self.output.flush()
+
+    def run(self):
+        """Run in the calling thread and return the summary dict"""
+        self._start_time = time.perf_counter()
+        slots = threading.BoundedSemaphore(self.concurrency * 2)
+
+        def task(number, row):
+            try:
+                self._run_row(number, row)
+            finally:
+                slots.release()
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            for number, row in self.rows:
+                slots.acquire()
+                if self._stop_event.is_set():
+                    slots.release()
+                    break
+                executor.submit(task, number, row)
+        self._end_time = time.perf_counter()
+        return self.summary()
+
+    def summary(self):
+        """Aggregate results (latencies in seconds)"""
+        elapsed = self.elapsed()
+        with self._lock:
+            return {
+                "index": self.index,
+                "method": self.req.get("method", "GET"),
+                "url": self.req.get("url", ""),
+                "rows": self.completed,
+                "ok": self.ok,
+                "failed": self.failed,
+                "wall_time": round(elapsed, 6),
+                "throughput": round(self.completed / elapsed, 3) if elapsed > 0 else None,
+                "latency": self.latency.summary(),
+                "status_codes": {str(k): v for k, v in sorted(self.status_counts.items())},
+                "errors": dict(sorted(self.error_counts.items()))
+            }
+
+
+def format_summary(summary):
+    """Human-readable multi-line text of a DatasetRun summary"""
+    lines = [
+        f"{summary['method']} {summary['url']}",
+        f"Rows: {summary['rows']} | OK: {summary['ok']} | Failed: {summary['failed']} | "
+        f"Wall time: {summary['wall_time']:.2f} sec"
+        + (f" | Throughput: {summary['throughput']:.1f} req/s" if summary["throughput"] else ""),
+    ]
+    lines += format_outcome(summary["latency"], summary["status_codes"], summary["errors"])
+    return "\n".join(lines)
@@ -0,0 +1,92 @@
+import json
+import re
+
+from json_format import loads
+from variables import UndefinedVariableError, substitute_variables
+
+EXTRACTOR_SOURCES = ("json", "regex", "header")
+# One extractor per line: variable = source:expression, e.g. token = json:$.data.token
+EXTRACTOR_LINE_PATTERN = re.compile(r"^\s*(\w+)\s*=\s*(\w+)\s*:\s*(.*?)\s*$")
+JSON_PATH_STEP_PATTERN = re.compile(r"\.([^.\[\]]+)|\[(-?\d+)\]|\['([^']*)'\]|\[\"([^\"]*)\"\]")
+
+
+class ExtractionError(ValueError):
+    """Raised when an extractor finds no value in a response"""
+
+
+def parse_extractors(text):
+    """
+    Parse the "extract" text of a saved request into [{"variable", "source", "expression"}, ...].
+    Each non-empty line is `variable = source:expression` with source json (a JSONPath such as $.items[0].id),
+    regex (the first group, or the whole match, of a regular expression) or header (a response header name).
+    """
+    extractors = []
+    for number, line in enumerate((text or "").splitlines(), 1):
+        if not line.strip():
+            continue
+        match = EXTRACTOR_LINE_PATTERN.match(line)
+        if match is None or match.group(2).lower() not in EXTRACTOR_SOURCES:
+            raise ValueError(f"Extractor line {number} must look like 'variable = json|regex|header:expression'")
+        extractors.append({"variable": match.group(1), "source": match.group(2).lower(), "expression": match.group(3)})
+    return extractors
+
+
+def json_path(value, path):
+    """Follow a simple JSONPath ($.key, $['key'], [index], negative indices allowed) into a decoded JSON value"""
+    path = path.strip()
+    if not path.startswith("$"):
+        raise ExtractionError(f"JSONPath must start with $: {path}")
+    position = 1
+    while position < len(path):
+        match = JSON_PATH_STEP_PATTERN.match(path, position)
+        if match is None:
+            raise ExtractionError(f"Unsupported JSONPath: {path}")
+        position = match.end()
+        key, index, quoted, double_quoted = match.groups()
+        try:
+            if index is not None:
+                value = value[int(index)]
+            else:
+                value = value[key if key is not None else quoted if quoted is not None else double_quoted]
+        except (KeyError, IndexError, TypeError):
+            raise ExtractionError(f"{path} not found in the response") from None
+    return value
+
+
+def extract(extractor, body_text, headers, variable_dict):
+    """Return the value of one extractor as text; the expression may itself contain {{variables}}"""
+    try:
+        expression = substitute_variables(extractor["expression"], variable_dict)
+    except UndefinedVariableError as e:
+        raise ExtractionError(f"Undefined variable {e.args[0]} in {extractor['expression']}") from None
+    source = extractor["source"]
+    if source == "header":
+        value = headers.get(expression)
+        if value is None:
+            raise ExtractionError(f"Header {expression} not found in the response")
+        return value
+    if source == "regex":
+        try:
+            match = re.search(expression, body_text)
+        except re.error as e:
+            raise ExtractionError(f"Invalid pattern {expression}: {e}") from None
+        if match is None:
+            raise ExtractionError(f"Pattern {expression} not found in the response")
+        return match.group(1) if match.groups() else match.group(0)
+    try:
+        document = loads(body_text)
+    except ValueError:
+        raise ExtractionError("Response body is not JSON") from None
+    value = json_path(document, expression)
+    return value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+
+
+def run_extractors(extractors, body_text, headers, variable_dict):
+    """Return {variable: value} of all extractors (raises ExtractionError on the first that fails)"""
+    values = {}
+    for extractor in extractors:
+        try:
+            values[extractor["variable"]] = extract(extractor, body_text, headers, variable_dict)
+        except ExtractionError as e:
+            raise ExtractionError(f"Extracting {extractor['variable']} failed: {e}") from None
+    return values
@@ -0,0 +1,425 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from blob_store import BlobStore
+from http_client import PHASE_LABELS, PHASES, format_ms, format_timings
+
+# Defaults for the history retention keys of the "settings" section of saved_requests.json
+DEFAULT_HISTORY_SETTINGS = {
+    "history_max_age_days": None,   # Delete entries older than this many days (None = keep forever)
+    "history_max_size_mb": None     # Delete the oldest entries while bodies take more than this (None = unlimited)
+}
+
+RETENTION_INTERVAL = 100  # Apply retention after this many new entries
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    request_time REAL NOT NULL,
+    response_time REAL,
+    request_key TEXT,
+    method TEXT,
+    description TEXT,
+    url TEXT,
+    request_headers TEXT,
+    request_body TEXT,
+    status INTEGER,
+    reason TEXT,
+    info TEXT,
+    response_headers TEXT,
+    body_file TEXT,
+    body_size INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    t_dns REAL,
+    t_connect REAL,
+    t_tls REAL,
+    t_ttfb REAL,
+    t_download REAL,
+    t_total REAL,
+    request_bytes INTEGER,
+    response_bytes INTEGER,
+    body_hash TEXT,
+    body_unchanged INTEGER
+);
+CREATE TABLE IF NOT EXISTS bodies (
+    entry_id INTEGER PRIMARY KEY,
+    content TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS blobs (
+    hash TEXT PRIMARY KEY,
+    codec TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    stored_size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_entries_request_time ON entries(request_time);
+CREATE INDEX IF NOT EXISTS idx_entries_request_key ON entries(request_key, request_time);
+CREATE INDEX IF NOT EXISTS idx_entries_status ON entries(status, request_time);
+CREATE INDEX IF NOT EXISTS idx_entries_url ON entries(url, request_time);
+"""
+
+# Columns added after the first schema version: (name, type). Missing ones are added to existing databases.
+ADDED_COLUMNS = [
+    ("t_dns", "REAL"),
+    ("t_connect", "REAL"),
+    ("t_tls", "REAL"),
+    ("t_ttfb", "REAL"),
+    ("t_download", "REAL"),
+    ("t_total", "REAL"),
+    ("request_bytes", "INTEGER"),
+    ("response_bytes", "INTEGER"),
+    ("body_hash", "TEXT"),
+    ("body_unchanged", "INTEGER")
+]
+
+# Phase timing keys (as produced by http_client.phase_timings) and their columns
+TIMING_COLUMNS = {
+    "dns": "t_dns",
+    "connect": "t_connect",
+    "tls": "t_tls",
+    "ttfb": "t_ttfb",
+    "download": "t_download",
+    "total": "t_total",
+    "request_bytes": "request_bytes",
+    "response_bytes": "response_bytes"
+}
+
+
+def format_entry_timings(entry):
+    """Phase breakdown text of an entry's timing columns"""
+    return format_timings({key: entry[column] for key, column in TIMING_COLUMNS.items()})
+
+
+def format_timing_summary(summary):
+    """One-line text of a timing_summary(), e.g. Last 12 runs (p50 / p90) | DNS: 0.1 / 0.3 ms | ..."""
+    if not summary["count"]:
+        return ""
+    parts = [f"Last {summary['count']} runs (p50 / p90)"]
+    for key in PHASES + ("total",):
+        if summary[key] is not None:
+            parts.append(f"{PHASE_LABELS[key]}: {format_ms(summary[key]['p50'], unit='')} / {format_ms(summary[key]['p90'])}")
+    return " | ".join(parts)
+
+
+class HistoryStore:
+    """
+    SQLite-backed history of sent requests and their responses.
+    Request data and response metadata are stored in the indexed "entries" table, so lookups by time,
+    request, status and URL are O(log n). Bodies are stored content-addressed and compressed under blobs/
+    (see BlobStore), so identical bodies are kept once; the "blobs" table lists them and entries refer to
+    them by SHA-256. Unreferenced blobs are removed by retention.
+    Entries written by earlier versions keep their bodies in the "bodies" table or in files under bodies/.
+    """
+
+    def __init__(self, folder, max_age_days=None, max_size_mb=None):
+        self.folder = folder
+        self.body_folder = os.path.join(folder, "bodies")
+        self.max_age_days = max_age_days
+        self.max_size_mb = max_size_mb
+        os.makedirs(self.body_folder, exist_ok=True)
+        self.blobs = BlobStore(os.path.join(folder, "blobs"))
+        self._pending_bodies = {}  # Entry id -> BlobWriter returned by open_body_file
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(folder, "history.db"), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._migrate()
+        self._writes_since_retention = 0
+
+    def _migrate(self):
+        existing = {row["name"] for row in self._conn.execute("PRAGMA table_info(entries)")}
+        with self._conn:
+            for name, column_type in ADDED_COLUMNS:
+                if name not in existing:
+                    self._conn.execute(f"ALTER TABLE entries ADD COLUMN {name} {column_type}")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_body_hash ON entries(body_hash)")
+
+    @classmethod
+    def from_settings(cls, folder, settings):
+        merged = dict(DEFAULT_HISTORY_SETTINGS)
+        merged.update(settings or {})
+        return cls(folder, max_age_days=merged["history_max_age_days"], max_size_mb=merged["history_max_size_mb"])
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def start_entry(self, request_time, request_key, method, description, url, request_headers, request_body):
+        """Record a request before it is sent and return the new entry id"""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO entries (request_time, request_key, method, description, url, request_headers, request_body) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (request_time.timestamp(), request_key, method, description, url, request_headers, request_body)
+            )
+            return cursor.lastrowid
+
+    def open_body_file(self, entry_id):
+        """
+        Open a text file to stream the entry's body into. The body is hashed and compressed as it is written;
+        the caller must close the file before finish_entry, which stores it.
+        """
+        writer = self.blobs.writer()
+        with self._lock:
+            self._pending_bodies[entry_id] = writer
+        return writer
+
+    def attach_body(self, entry_id, blob):
+        """
+        Use an already compressed blob (e.g. from BlobStore.import_blob) as the entry's body; finish_entry stores it.
+        """
+        with self._lock:
+            self._pending_bodies[entry_id] = blob
+
+    def _store_body(self, entry_id, writer):
+        """Keep a closed body writer's blob (unless the same content is already stored); returns (hash, unchanged)"""
+        exists = self._conn.execute("SELECT 1 FROM blobs WHERE hash = ?", (writer.digest,)).fetchone() is not None
+        stored_size = self.blobs.commit(writer, exists)
+        if stored_size is not None:
+            self._conn.execute("INSERT INTO blobs (hash, codec, size, stored_size) VALUES (?, ?, ?, ?)",
+                               (writer.digest, writer.codec, writer.size, stored_size))
+        # Compare with the body of the previous successful run of the same request
+        previous = self._conn.execute(
+            "SELECT body_hash FROM entries WHERE request_key = (SELECT request_key FROM entries WHERE id = ?) "
+            "AND id < ? AND body_hash IS NOT NULL AND error IS NULL ORDER BY request_time DESC LIMIT 1",
+            (entry_id, entry_id)
+        ).fetchone()
+        return writer.digest, None if previous is None else previous["body_hash"] == writer.digest
+
+    def finish_entry(self, entry_id, response_time, status=None, reason=None, info=None,
+                     response_headers=None, body_text=None, error=None, timings=None):
+        """
+        Record the response of an entry. body_text is stored as a blob; omit it when the body was streamed
+        into open_body_file(). timings is the dict of http_client.phase_timings().
+        Returns {"body_hash": sha256 or None, "unchanged": True/False, or None if there is no previous run to compare}.
+        """
+        timings = timings or {}
+        with self._lock:
+            writer = self._pending_bodies.pop(entry_id, None)
+        if body_text is not None:
+            if writer is not None:
+                writer.discard()
+            writer = self.blobs.write_text(body_text)
+        body_hash = unchanged = None
+        body_size = 0
+        with self._lock:
+            with self._conn:
+                if writer is not None:
+                    writer.close()
+                    body_size = writer.size
+                    body_hash, unchanged = self._store_body(entry_id, writer)
+                    if error is not None:
+                        unchanged = None  # A cancelled download is not comparable
+                self._conn.execute(
+                    "UPDATE entries SET response_time = ?, status = ?, reason = ?, info = ?, response_headers = ?, "
+                    "body_size = ?, error = ?, body_hash = ?, body_unchanged = ?, "
+                    + ", ".join(f"{column} = ?" for column in TIMING_COLUMNS.values())
+                    + " WHERE id = ?",
+                    (response_time.timestamp(), status, reason, info,
+                     json.dumps(dict(response_headers)) if response_headers is not None else None,
+                     body_size, error, body_hash, None if unchanged is None else int(unchanged),
+                     *(timings.get(key) for key in TIMING_COLUMNS), entry_id)
+                )
+            self._writes_since_retention += 1
+            run_retention = self._writes_since_retention >= RETENTION_INTERVAL
+        if run_retention:
+            self.apply_retention()
+        return {"body_hash": body_hash, "unchanged": unchanged}
+
+    def get(self, entry_id):
+        """Return the entry metadata as a dict, or None"""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM entries WHERE id = ?", (entry_id,)).fetchone()
+        return dict(row) if row is not None else None
+
+    def query(self, since=None, until=None, request_key=None, status=None, url_prefix=None, limit=200):
+        """
+        Return entry metadata dicts, newest first. since/until are datetimes; url_prefix matches the start of the URL.
+        Each filter is served by an index.
+        """
+        clauses = []
+        params = []
+        if since is not None:
+            clauses.append("request_time >= ?")
+            params.append(since.timestamp())
+        if until is not None:
+            clauses.append("request_time < ?")
+            params.append(until.timestamp())
+        if request_key is not None:
+            clauses.append("request_key = ?")
+            params.append(request_key)
+        if status is not None:
+            clauses.append("status = ?")
+            params.append(status)
+        if url_prefix:
+            # Range condition instead of LIKE so the url index is used
+            clauses.append("url >= ? AND url < ?")
+            params.extend([url_prefix, url_prefix + "\U0010ffff"])
+        sql = "SELECT * FROM entries"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY request_time DESC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, params)]
+
+    def timing_summary(self, request_key, limit=50):
+        """
+        Median and 90th percentile of each phase over the last `limit` successful sends of a request
+        (seconds; byte counts as medians). Returns {"count": n, "ttfb": {"p50": s, "p90": s}, ...}.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM entries WHERE request_key = ? AND t_total IS NOT NULL "
+                "ORDER BY request_time DESC LIMIT ?", (request_key, limit)
+            ).fetchall()
+        summary = {"count": len(rows)}
+        for key, column in TIMING_COLUMNS.items():
+            values = sorted(row[column] for row in rows if row[column] is not None)
+            if not values:
+                summary[key] = None
+                continue
+            summary[key] = {
+                "p50": values[(len(values) - 1) // 2],
+                "p90": values[min(len(values) - 1, int(len(values) * 0.9))]
+            }
+        return summary
+
+    def _blob_codec(self, body_hash):
+        blob = self.blob_info(body_hash)
+        return blob["codec"] if blob is not None else None
+
+    def blob_info(self, body_hash):
+        """Return {"hash", "codec", "size", "stored_size"} of a stored body blob, or None"""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM blobs WHERE hash = ?", (body_hash,)).fetchone()
+        return dict(row) if row is not None else None
+
+    def body_path(self, entry_id):
+        """
+        Path of an uncompressed file with the entry's body, e.g. to memory-map it (a stored blob is
+        decompressed into the cache on first use), or None if the body is kept in the database.
+        """
+        entry = self.get(entry_id)
+        if entry is None:
+            return None
+        if entry["body_hash"]:
+            codec = self._blob_codec(entry["body_hash"])
+            return self.blobs.materialize(entry["body_hash"], codec) if codec else None
+        if not entry["body_file"]:
+            return None
+        return os.path.join(self.body_folder, entry["body_file"])
+
+    def read_body(self, entry_id):
+        """Return the full response body text of an entry ("" if there is none)"""
+        entry = self.get(entry_id)
+        if entry is None:
+            return ""
+        if entry["body_hash"]:
+            codec = self._blob_codec(entry["body_hash"])
+            return self.blobs.read_text(entry["body_hash"], codec) if codec else ""
+        if entry["body_file"]:
+            path = os.path.join(self.body_folder, entry["body_file"])
+            if not os.path.exists(path):
+                return ""
+            with open(path, "r", encoding="utf-8") as f:
+                return f.read()
+        with self._lock:
+            row = self._conn.execute("SELECT content FROM bodies WHERE entry_id = ?", (entry_id,)).fetchone()
+        return row["content"] if row is not None else ""
+
+    def render_header(self, entry):
+        """Text of the request and response metadata of an entry, in the layout of the former history .txt files"""
+        def fmt(timestamp):
+            return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S") if timestamp else "-"
+
+        return (
+            f"[Request Timestamp] {fmt(entry['request_time'])}\n"
+            f"Method: {entry['method']}\n"
+            f"Description: {entry['description']}\n"
+            f"URL: {entry['url']}\n"
+            f"Headers:\n{entry['request_headers']}\n"
+            f"Body:\n{entry['request_body']}\n\n"
+            f"[Response Timestamp] {fmt(entry['response_time'])}\n"
+            f"Response Info: {entry['info']}\n"
+            + (f"Timings: {format_entry_timings(entry)}\n" if entry["t_total"] is not None else "")
+            + (f"Error: {entry['error']}\n" if entry["error"] else "")
+            + (f"Body SHA-256: {entry['body_hash']}"
+               + (" (unchanged since previous run)" if entry["body_unchanged"] else "") + "\n"
+               if entry["body_hash"] else "")
+            + "Response Body:\n"
+        )
+
+    def render(self, entry_id):
+        """Full text of an entry (metadata followed by the body)"""
+        entry = self.get(entry_id)
+        if entry is None:
+            return None
+        return self.render_header(entry) + self.read_body(entry_id)
+
+    def _delete_entries(self, rows):
+        """Delete entries and their legacy bodies; blobs are removed by _collect_garbage"""
+        for row in rows:
+            if row["body_file"]:
+                path = os.path.join(self.body_folder, row["body_file"])
+                if os.path.exists(path):
+                    os.remove(path)
+        ids = [(row["id"],) for row in rows]
+        with self._conn:
+            self._conn.executemany("DELETE FROM bodies WHERE entry_id = ?", ids)
+            self._conn.executemany("DELETE FROM entries WHERE id = ?", ids)
+
+    def _collect_garbage(self):
+        """Delete blobs that no entry refers to any more"""
+        rows = self._conn.execute(
+            "SELECT hash, codec FROM blobs WHERE NOT EXISTS (SELECT 1 FROM entries WHERE body_hash = blobs.hash)"
+        ).fetchall()
+        for row in rows:
+            self.blobs.delete(row["hash"], row["codec"])
+        with self._conn:
+            self._conn.executemany("DELETE FROM blobs WHERE hash = ?", [(row["hash"],) for row in rows])
+
+    def apply_retention(self):
+        """
+        Delete entries older than max_age_days, then the oldest entries while stored bodies exceed max_size_mb,
+        and finally the blobs no longer referenced. Sizes count each stored (compressed) blob once, so deleting
+        an entry only frees space once no other entry shares its body.
+        """
+        with self._lock:
+            self._writes_since_retention = 0
+            if self.max_age_days is not None:
+                cutoff = time.time() - float(self.max_age_days) * 86400
+                rows = self._conn.execute(
+                    "SELECT id, body_file FROM entries WHERE request_time < ?", (cutoff,)
+                ).fetchall()
+                self._delete_entries(rows)
+            if self.max_size_mb is not None:
+                limit = float(self.max_size_mb) * 1024 * 1024
+                total = self._conn.execute(
+                    "SELECT COALESCE(SUM(body_size), 0) FROM entries WHERE body_hash IS NULL"
+                ).fetchone()[0]
+                total += self._conn.execute("SELECT COALESCE(SUM(stored_size), 0) FROM blobs").fetchone()[0]
+                if total > limit:
+                    references = dict(self._conn.execute(
+                        "SELECT body_hash, COUNT(*) FROM entries WHERE body_hash IS NOT NULL GROUP BY body_hash"
+                    ).fetchall())
+                    stored_sizes = dict(self._conn.execute("SELECT hash, stored_size FROM blobs").fetchall())
+                    doomed = []
+                    for row in self._conn.execute(
+                            "SELECT id, body_file, body_size, body_hash FROM entries ORDER BY request_time"):
+                        if total <= limit:
+                            break
+                        doomed.append(row)
+                        if row["body_hash"] is None:
+                            total -= row["body_size"]
+                            continue
+                        references[row["body_hash"]] -= 1
+                        if references[row["body_hash"]] == 0:
+                            total -= stored_sizes.get(row["body_hash"], 0)
+                    self._delete_entries(doomed)
+            self._collect_garbage()
+        self.blobs.clear_temporary()
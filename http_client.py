@@ -0,0 +1,395 @@
+import codecs
+import json
+import mimetypes
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+from variables import compile_request
+
+# Defaults for the "settings" section of saved_requests.json
+DEFAULT_SETTINGS = {
+    "pool_size": 10,            # Max keep-alive connections kept per scheme/host/port
+    "pool_idle_timeout": 60,    # Seconds a session may stay unused before it is closed
+    "max_retries": 0,           # Retries for failed connections (idempotent methods only)
+    "retry_backoff": 0.5,       # Backoff factor between retries (seconds, exponential)
+    "connect_timeout": 10,      # Default seconds to wait for a connection (per request "connect_timeout" overrides)
+    "read_timeout": 60,         # Default seconds to wait between received bytes (per request "read_timeout" overrides)
+    "max_parallel_sends": 4     # Requests the GUI sends at the same time; further sends wait in the queue
+}
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+STREAM_CHUNK_SIZE = 64 * 1024       # Bytes read per iteration when streaming a body
+STREAM_MEMORY_LIMIT = 1024 * 1024   # Bodies up to this size are kept in memory; larger ones are spilled to disk
+PREVIEW_CHARS = 10000               # Characters of a spilled body kept in memory for the preview
+PROGRESS_INTERVAL = 0.1             # Minimum seconds between progress callbacks
+
+
+class SendCancelled(Exception):
+    """Raised inside a send when the user cancelled it"""
+
+
+def request_timeout(req, settings):
+    """
+    Return the (connect, read) timeout in seconds for a saved request.
+    Empty per-request values fall back to the defaults in settings.
+    """
+    merged = dict(DEFAULT_SETTINGS)
+    merged.update(settings or {})
+    connect = req.get("connect_timeout") or merged["connect_timeout"]
+    read = req.get("read_timeout") or merged["read_timeout"]
+    return (float(connect) if connect else None, float(read) if read else None)
+
+
+class SessionPool:
+    """
+    Keep-alive requests.Session objects shared between sends, one per (scheme, host, port).
+    Sessions that have not been used for idle_timeout seconds are closed on the next lookup.
+    """
+
+    def __init__(self, pool_size=10, idle_timeout=60, max_retries=0, backoff_factor=0.5):
+        self.pool_size = pool_size
+        self.idle_timeout = idle_timeout
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self._sessions = {}  # (scheme, host, port) -> [session, last used time]
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, settings, min_pool_size=0):
+        """
+        Create a pool from the "settings" dict stored in saved_requests.json.
+        min_pool_size raises the pool size, e.g. to one connection per worker thread.
+        """
+        merged = dict(DEFAULT_SETTINGS)
+        merged.update(settings or {})
+        return cls(
+            pool_size=max(int(merged["pool_size"]), min_pool_size),
+            idle_timeout=float(merged["pool_idle_timeout"]),
+            max_retries=int(merged["max_retries"]),
+            backoff_factor=float(merged["retry_backoff"])
+        )
+
+    @staticmethod
+    def pool_key(url):
+        """Return the (scheme, host, port) key that decides which session a URL uses"""
+        parts = urlsplit(url)
+        scheme = parts.scheme.lower()
+        try:
+            port = parts.port
+        except ValueError:
+            port = None
+        return (scheme, (parts.hostname or "").lower(), port or DEFAULT_PORTS.get(scheme))
+
+    def _new_session(self):
+        # requests and urllib3 take longer to import than the rest of the app; they are loaded with the first session
+        from timed_transport import new_session
+
+        session = new_session(self.pool_size, self.max_retries, self.backoff_factor)
+        session.hooks["response"].append(self._mark_connection)
+        return session
+
+    @staticmethod
+    def _mark_connection(response, **kwargs):
+        """
+        Response hook: record on the response whether its socket was already used by an earlier request,
+        and the DNS/connect/TLS times if the connection was set up for this request (zero when reused).
+        urllib3 may reconnect a dropped connection on the same connection object, so the socket is compared.
+        """
+        raw = response.raw
+        conn = getattr(raw, "connection", None) or getattr(raw, "_connection", None)
+        sock = getattr(conn, "sock", None)
+        if sock is None:
+            response.connection_reused = None
+            response.setup_timings = None
+            return response
+        response.connection_reused = getattr(conn, "_ez_last_sock", None) is sock
+        conn._ez_last_sock = sock
+        if response.connection_reused:
+            response.setup_timings = {"dns": 0.0, "connect": 0.0, "tls": 0.0}
+        else:
+            response.setup_timings = getattr(conn, "setup_timings", None)
+        return response
+
+    def _evict_idle(self, now):
+        for key, (session, last_used) in list(self._sessions.items()):
+            if now - last_used > self.idle_timeout:
+                del self._sessions[key]
+                session.close()
+
+    def get(self, url):
+        """Return the session for the URL's scheme/host/port, creating it if necessary"""
+        key = self.pool_key(url)
+        now = time.monotonic()
+        with self._lock:
+            self._evict_idle(now)
+            entry = self._sessions.get(key)
+            if entry is None:
+                entry = self._sessions[key] = [self._new_session(), now]
+            entry[1] = now
+            return entry[0]
+
+    def request(self, method, url, **kwargs):
+        """
+        Send a request through the pooled session.
+        The returned response has a connection_reused attribute (True, False or None if unknown).
+        """
+        return self.get(url).request(method, url, **kwargs)
+
+    def close(self):
+        """Close all sessions and their connections"""
+        with self._lock:
+            for session, _ in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+
+def describe_connection(response):
+    """Short text for the response info line telling warm (reused) and cold (new) connections apart"""
+    reused = getattr(response, "connection_reused", None)
+    if reused is None:
+        return "Connection: unknown"
+    return "Connection: reused" if reused else "Connection: new"
+
+
+def parse_headers(headers_text):
+    """Parse "key: value" lines into a headers dict, ignoring lines without a colon"""
+    headers = {}
+    for line in headers_text.splitlines():
+        if ":" in line:
+            key, value = line.split(":", 1)
+            headers[key.strip()] = value.strip()
+    return headers
+
+
+def body_kwargs(body_text):
+    """Return the requests keyword argument for the body: json= if the text is valid JSON, data= otherwise"""
+    try:
+        json_body = json.loads(body_text) if body_text else None
+    except json.JSONDecodeError:
+        json_body = None
+    if json_body is not None:
+        return {"json": json_body}
+    return {"data": body_text}
+
+
+class FileBody:
+    """
+    Request body streamed from a file in chunks. It can be iterated more than once (retries, repeated sends in
+    load tests), and len() gives requests the Content-Length, so the upload is not sent with chunked encoding.
+    """
+
+    def __init__(self, path, chunk_size=STREAM_CHUNK_SIZE, cancel_event=None):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.size = os.path.getsize(path)
+        self.cancel_event = cancel_event  # When set, the upload stops with SendCancelled
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        with open(self.path, "rb") as f:
+            while True:
+                if self.cancel_event is not None and self.cancel_event.is_set():
+                    raise SendCancelled()
+                chunk = f.read(self.chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+
+    def describe(self):
+        """Stand-in text for the body in the response area and history"""
+        return f"[Streamed file: {os.path.basename(self.path)}, {self.size} bytes]"
+
+
+def file_content_type(path, size):
+    """
+    Content-Type for a file streamed as the whole body, or None to send none. Files holding JSON are sent as
+    application/json, as the body used to go out through json= when it was read and parsed as text; other files
+    get the type guessed from their name, and files of unknown type none (like a non-JSON text body before).
+    Files up to STREAM_MEMORY_LIMIT are parsed to tell whether they are JSON, larger ones only by their first character.
+    """
+    guessed = mimetypes.guess_type(path)[0]
+    if guessed == "application/json":
+        return guessed
+    with open(path, "rb") as f:
+        head = f.read(min(size, STREAM_MEMORY_LIMIT))
+    if size > STREAM_MEMORY_LIMIT:
+        return "application/json" if head.lstrip()[:1] in (b"{", b"[") else guessed
+    try:
+        is_json = json.loads(head) is not None  # body_kwargs sends null as data=, too
+    except ValueError:
+        is_json = False
+    return "application/json" if is_json else guessed
+
+
+def prepare_send(req, variable_dict, variables_folder="variables", on_file_error=None):
+    """
+    Substitute variables in a saved request and return a dict with the substituted "url", "headers_text" and
+    "body_text" (for display and history) and the parsed "headers" and requests "send_kwargs" (for sending).
+    If the whole body is a single file variable the file is streamed from disk: it is not read, decoded or
+    parsed as JSON. A Content-Type (see file_content_type) is added when the request does not set one.
+    Raises UndefinedVariableError if the request references an undefined variable.
+    """
+    compiled = compile_request(req)
+    body_file = compiled.body_file(variable_dict, variables_folder)
+    url, headers_text, body_text = compiled.render(variable_dict, variables_folder, on_file_error,
+                                                   skip_body=body_file is not None)
+    headers = parse_headers(headers_text)
+    if body_file is not None:
+        file_body = FileBody(body_file)
+        content_type = file_content_type(body_file, file_body.size)
+        if content_type and not any(key.lower() == "content-type" for key in headers):
+            headers["Content-Type"] = content_type
+        body_text = file_body.describe()
+        # requests sends an empty iterable with chunked encoding; an empty body gets Content-Length: 0 instead
+        send_kwargs = {"data": file_body if file_body.size else b""}
+    else:
+        send_kwargs = body_kwargs(body_text)
+    return {"url": url, "headers_text": headers_text, "body_text": body_text, "headers": headers, "send_kwargs": send_kwargs}
+
+
+def prepare_request(req, variable_dict):
+    """
+    Substitute variables in a saved request and return (url, headers, send_kwargs).
+    Raises UndefinedVariableError if the request references an undefined variable.
+    """
+    prepared = prepare_send(req, variable_dict)
+    return prepared["url"], prepared["headers"], prepared["send_kwargs"]
+
+
+def download_body(response, open_spill, memory_limit=STREAM_MEMORY_LIMIT, preview_chars=PREVIEW_CHARS,
+                  on_progress=None, chunk_size=STREAM_CHUNK_SIZE, cancel_event=None):
+    """
+    Read the body of a response sent with stream=True using bounded memory.
+    The body is decoded incrementally (response.encoding, utf-8 if missing or unknown). If it stays within memory_limit bytes
+    the full text is returned; otherwise open_spill() is called once to get a writable text file, everything read so far
+    and all further chunks are written to it, and only the first preview_chars characters are kept.
+    on_progress(bytes_received, content_length or None, seconds) is called at most every PROGRESS_INTERVAL seconds.
+    If cancel_event is set during the download, the response is closed and SendCancelled is raised.
+    Returns a dict: {"text": full text or None if spilled, "preview": str, "bytes": int, "spill_file": file or None}.
+    The spill file is left open so the caller can append to it; the caller must close it.
+    """
+    try:
+        content_length = int(response.headers.get("Content-Length", ""))
+    except ValueError:
+        content_length = None
+    try:
+        decoder = codecs.getincrementaldecoder(response.encoding or "utf-8")(errors="replace")
+    except LookupError:
+        # Unknown charset (e.g. "utf8mb4"): decode as utf-8 like requests' response.text does
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    pieces = []
+    preview = ""
+    spill_file = None
+    received = 0
+    start_time = time.perf_counter()
+    last_progress = 0.0
+    try:
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            if cancel_event is not None and cancel_event.is_set():
+                raise SendCancelled()
+            received += len(chunk)
+            text = decoder.decode(chunk)
+            if spill_file is None:
+                pieces.append(text)
+                if received > memory_limit:
+                    spill_file = open_spill()
+                    buffered = "".join(pieces)
+                    pieces = []
+                    preview = buffered[:preview_chars]
+                    spill_file.write(buffered)
+            else:
+                spill_file.write(text)
+            if on_progress is not None:
+                now = time.perf_counter()
+                if now - last_progress >= PROGRESS_INTERVAL:
+                    last_progress = now
+                    on_progress(received, content_length, now - start_time)
+        tail = decoder.decode(b"", final=True)
+    except BaseException:
+        response.close()
+        if spill_file is not None:
+            spill_file.close()
+        raise
+    if on_progress is not None:
+        on_progress(received, content_length, time.perf_counter() - start_time)
+    if spill_file is not None:
+        spill_file.write(tail)
+        return {"text": None, "preview": preview, "bytes": received, "spill_file": spill_file}
+    text = "".join(pieces) + tail
+    return {"text": text, "preview": text[:preview_chars], "bytes": received, "spill_file": None}
+
+
+def format_bytes(size):
+    """Human-readable byte count, e.g. 1.5 MB"""
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+def format_ms(seconds, digits=1, unit=" ms"):
+    """Seconds as milliseconds, e.g. 12.3 ms; "-" for None"""
+    return "-" if seconds is None else f"{seconds * 1000:.{digits}f}{unit}"
+
+
+PHASES = ("dns", "connect", "tls", "ttfb", "download")  # In the order they happen during one send
+PHASE_LABELS = {"dns": "DNS", "connect": "Connect", "tls": "TLS", "ttfb": "TTFB", "download": "Download", "total": "Total"}
+
+
+def request_size(prepared_request):
+    """Approximate bytes sent: request line, headers and body"""
+    size = len(f"{prepared_request.method} {prepared_request.path_url} HTTP/1.1\r\n\r\n")
+    size += sum(len(key) + len(str(value)) + 4 for key, value in prepared_request.headers.items())
+    body = prepared_request.body
+    if body is not None:
+        size += len(body)
+    return size
+
+
+def response_size(response, body_bytes):
+    """Approximate bytes received: status line, headers and the body as transferred (before decompression)"""
+    size = len(f"HTTP/1.1 {response.status_code} {response.reason or ''}\r\n\r\n")
+    size += sum(len(key) + len(value) + 4 for key, value in response.headers.items())
+    try:
+        wire_body = response.raw.tell()
+    except Exception:
+        wire_body = 0
+    return size + (wire_body or body_bytes)
+
+
+def phase_timings(response, start, headers_received, finished, body_bytes):
+    """
+    Break the time of one send into phases (seconds, from time.perf_counter() stamps):
+    dns, connect and tls (zero on a reused connection), ttfb (sending the request and waiting for the
+    response headers), download (reading the body), plus total and request/response byte counts.
+    Setup phases are None if they could not be measured (e.g. through a proxy).
+    """
+    setup = getattr(response, "setup_timings", None)
+    setup_total = sum(setup.values()) if setup else 0.0
+    timings = {
+        "dns": setup["dns"] if setup else None,
+        "connect": setup["connect"] if setup else None,
+        "tls": setup["tls"] if setup else None,
+        "ttfb": max(0.0, headers_received - start - setup_total),
+        "download": finished - headers_received,
+        "total": finished - start,
+        "request_bytes": request_size(response.request),
+        "response_bytes": response_size(response, body_bytes)
+    }
+    return timings
+
+
+def format_timings(timings):
+    """One-line text of a phase breakdown, e.g. DNS: 1.2 ms | Connect: 0.4 ms | ... | Sent: 210 B | Received: 2.1 KB"""
+    def size(value):
+        return "-" if value is None else format_bytes(value)
+
+    parts = [f"{PHASE_LABELS[key]}: {format_ms(timings[key])}" for key in PHASES]
+    parts.append(f"Sent: {size(timings['request_bytes'])}")
+    parts.append(f"Received: {size(timings['response_bytes'])}")
+    return " | ".join(parts)
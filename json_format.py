@@ -0,0 +1,186 @@
+import json
+import re
+
+# Optional faster JSON backend (pip install orjson); the standard library is used without it
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+INDENT = " " * 4
+MAX_VALIDATE_CHARS = 4 * 1024 * 1024  # Bodies without a JSON content type are parsed to check them only up to this size
+MAX_DECODED_VALUE_BYTES = 64 * 1024  # Larger leaf values are shown as raw (truncated) JSON text in the tree
+CHILDREN_PER_BATCH = 1000  # Children listed per expansion step of a tree node
+
+# One JSON token, or a run of whitespace. Strings use the unrolled form so long strings match without backtracking.
+TOKEN_PATTERN = re.compile(
+    r'\s+|"[^"\\]*(?:\\.[^"\\]*)*"|[{}\[\]:,]|-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][+-]?\d+)?|true|false|null'
+)
+WHITESPACE_PATTERN = re.compile(r"\s*")
+# Strings and structural characters of UTF-8 JSON bytes; scalars and whitespace between them are skipped
+STRUCTURE_PATTERN = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"|[{}\[\]:,]')
+WHITESPACE_BYTES = b" \t\r\n"
+
+
+def loads(data):
+    """Parse JSON text or UTF-8 bytes with the fastest available backend"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def looks_like_json(text, content_type=None, truncated=False):
+    """
+    True if a body should be formatted as JSON: the content type says so, or the text starts like a JSON
+    object/array and (for complete, reasonably small texts) actually parses.
+    """
+    if content_type and "json" in content_type.lower():
+        return True
+    if text.lstrip()[:1] not in ("{", "["):
+        return False
+    if truncated or len(text) > MAX_VALIDATE_CHARS:
+        return True
+    try:
+        loads(text)
+    except ValueError:
+        return False
+    return True
+
+
+def pretty_preview(text, limit, truncated=False):
+    """
+    Re-indent JSON text token by token (like json.dumps(indent=4)) and stop once limit characters are produced,
+    so only the part that is displayed is ever formatted and nothing is parsed into objects.
+    truncated means text is only the beginning of the body; an incomplete last token is then kept as is.
+    Returns (formatted, complete), or None if the text turns out not to be JSON.
+    """
+    out = []
+    size = 0
+    depth = 0
+    position = 0
+    length = len(text)
+    while position < length:
+        if size >= limit:
+            if WHITESPACE_PATTERN.match(text, position).end() == length:
+                break  # Only trailing whitespace is left
+            return "".join(out)[:limit], False
+        match = TOKEN_PATTERN.match(text, position)
+        if match is None:
+            if truncated:
+                out.append(text[position:])
+                break
+            return None
+        token = match.group()
+        position = match.end()
+        if token[0] in " \t\r\n":
+            continue
+        if token in ("{", "["):
+            following = WHITESPACE_PATTERN.match(text, position).end()
+            closing = "}" if token == "{" else "]"
+            if text.startswith(closing, following):
+                piece = token + closing
+                position = following + 1
+            else:
+                depth += 1
+                piece = token + "\n" + INDENT * depth
+        elif token in ("}", "]"):
+            depth = max(0, depth - 1)
+            piece = "\n" + INDENT * depth + token
+        elif token == ",":
+            piece = ",\n" + INDENT * depth
+        elif token == ":":
+            piece = ": "
+        else:
+            piece = token
+        out.append(piece)
+        size += len(piece)
+    formatted = "".join(out)
+    if len(formatted) > limit:
+        return formatted[:limit], False
+    return formatted, not truncated
+
+
+def format_preview(text, limit, content_type=None, truncated=False):
+    """
+    Text to display for a response body: pretty-printed JSON if it looks like JSON, otherwise the text itself,
+    in both cases cut at limit characters. Returns (preview, complete).
+    """
+    if looks_like_json(text, content_type, truncated):
+        result = pretty_preview(text, limit, truncated)
+        if result is not None:
+            return result
+    return text[:limit], not truncated and len(text) <= limit
+
+
+def _skip_whitespace(data, start, end):
+    while start < end and data[start] in WHITESPACE_BYTES:
+        start += 1
+    while end > start and data[end - 1] in WHITESPACE_BYTES:
+        end -= 1
+    return start, end
+
+
+def value_span(data, start=0, end=None):
+    """(start, end) of the top-level JSON value of UTF-8 bytes (or an mmap), without surrounding whitespace"""
+    return _skip_whitespace(data, start, len(data) if end is None else end)
+
+
+def scan_children(data, start, end, resume=None, limit=CHILDREN_PER_BATCH):
+    """
+    List the direct children of the JSON object or array spanning data[start:end] without decoding anything.
+    Returns (children, resume): children are (key_span or None, value_start, value_end) byte offsets, and
+    resume is the offset to pass back to get the next batch after limit children (None when done).
+    Nested values are skipped by scanning their strings and brackets only.
+    """
+    is_object = data[start] == ord("{")
+    segment = start + 1 if resume is None else resume
+    key = None
+    value_start = None if is_object else segment
+    depth = 0
+    children = []
+
+    def finish(segment_end):
+        if value_start is None:
+            return
+        child_start, child_end = _skip_whitespace(data, value_start, segment_end)
+        if child_start < child_end:
+            children.append((key, child_start, child_end))
+
+    for match in STRUCTURE_PATTERN.finditer(data, segment, end):
+        char = data[match.start()]
+        if char == ord('"'):
+            if depth == 0 and is_object and key is None:
+                key = match.span()
+        elif char in b"{[":
+            depth += 1
+        elif char in b"}]":
+            if depth == 0:
+                finish(match.start())
+                return children, None
+            depth -= 1
+        elif char == ord(":"):
+            if depth == 0 and is_object and value_start is None:
+                value_start = match.end()
+        elif depth == 0:  # ","
+            finish(match.start())
+            segment = match.end()
+            key = None
+            value_start = None if is_object else segment
+            if len(children) >= limit:
+                return children, segment
+    finish(end)
+    return children, None
+
+
+def decode_value(data, start, end):
+    """
+    Decoded Python value of a leaf (string, number, true/false/null) at data[start:end].
+    Values larger than MAX_DECODED_VALUE_BYTES are not decoded; their raw text prefix is returned instead.
+    """
+    if end - start > MAX_DECODED_VALUE_BYTES:
+        return bytes(data[start:start + MAX_DECODED_VALUE_BYTES]).decode("utf-8", errors="replace") + "..."
+    raw = bytes(data[start:end])
+    try:
+        return loads(raw)
+    except ValueError:
+        return raw.decode("utf-8", errors="replace")
@@ -0,0 +1,248 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from http_client import format_ms
+
+
+class LatencyHistogram:
+    """
+    HDR-style latency histogram with log-linear buckets.
+    Values are recorded in microseconds. Every power-of-two range is split into 2 ** (sub_bucket_bits - 1)
+    linear sub-buckets, so reported percentiles are within about 1 / 2 ** (sub_bucket_bits - 1) of the true value
+    while memory stays constant regardless of how many samples are recorded.
+    """
+
+    def __init__(self, sub_bucket_bits=8):
+        self.sub_bucket_bits = sub_bucket_bits
+        self.counts = {}  # bucket index -> count
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def _index(self, value):
+        shift = max(0, value.bit_length() - self.sub_bucket_bits)
+        if shift == 0:
+            return value
+        half = 1 << (self.sub_bucket_bits - 1)
+        return shift * half + (value >> shift)
+
+    def _value_at(self, index):
+        """Highest value that falls into the bucket (so percentiles are never under-reported)"""
+        full = 1 << self.sub_bucket_bits
+        if index < full:
+            return index
+        half = full >> 1
+        shift = (index - full) // half + 1
+        mantissa = index - shift * half
+        return ((mantissa + 1) << shift) - 1
+
+    def record(self, seconds):
+        """Record one latency given in seconds"""
+        value = max(0, int(seconds * 1_000_000))
+        index = self._index(value)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def percentile(self, percent):
+        """Return the latency (seconds) below which the given percentage of samples fall"""
+        if not self.count:
+            return None
+        target = max(1, int(round(self.count * percent / 100.0)))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                return min(self._value_at(index), self.max) / 1_000_000
+        return self.max / 1_000_000
+
+    def summary(self):
+        """Return min/mean/p50/p90/p99/max in seconds as a dict"""
+        if not self.count:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "min": self.min / 1_000_000,
+            "mean": round(self.total / self.count / 1_000_000, 6),
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "max": self.max / 1_000_000
+        }
+
+
+class LoadTest:
+    """
+    Repeatedly send one (already substituted) request and collect latency statistics.
+
+    With rps set the run is open-loop: request i is scheduled at start + i / rps no matter how long
+    earlier requests take, and its latency is measured from that intended time. Time spent waiting for
+    a free worker therefore counts as latency, which avoids coordinated omission.
+    Without rps the run is closed-loop: `concurrency` workers send back to back.
+    The run ends after `total` requests or `duration` seconds, whichever comes first.
+    """
+
+    def __init__(self, session_pool, method, url, headers=None, send_kwargs=None,
+                 total=None, duration=None, rps=None, concurrency=10, timeout=None):
+        if total is None and duration is None:
+            raise ValueError("Either a total request count or a duration is required")
+        if rps is not None and rps <= 0:
+            raise ValueError("Target RPS must be positive")
+        self.session_pool = session_pool
+        self.method = method
+        self.url = url
+        self.headers = headers or {}
+        self.send_kwargs = send_kwargs or {}
+        self.total = total
+        self.duration = duration
+        self.rps = rps
+        self.concurrency = max(1, concurrency)
+        self.timeout = timeout
+
+        self.latency = LatencyHistogram()       # Measured from the intended send time
+        self.service_time = LatencyHistogram()  # Measured from the actual send time
+        self.status_counts = {}
+        self.error_counts = {}
+        self.completed = 0
+        self.started = 0
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._start_time = None
+        self._end_time = None
+
+    def stop(self):
+        """Ask a running test to stop scheduling new requests"""
+        self._stop_event.set()
+
+    def elapsed(self):
+        if self._start_time is None:
+            return 0.0
+        return (self._end_time or time.perf_counter()) - self._start_time
+
+    def _send_one(self, intended_time):
+        from requests.exceptions import RequestException  # Loaded with the first session; see SessionPool
+
+        sent_time = time.perf_counter()
+        error = None
+        status = None
+        try:
+            response = self.session_pool.request(self.method, self.url, headers=self.headers,
+                                                 timeout=self.timeout, **self.send_kwargs)
+            response.content  # Read the whole body so download time is included
+            status = response.status_code
+            if status >= 400:
+                error = f"HTTP {status}"
+        except RequestException as e:
+            error = type(e).__name__
+        done_time = time.perf_counter()
+        with self._lock:
+            self.latency.record(done_time - intended_time)
+            self.service_time.record(done_time - sent_time)
+            self.completed += 1
+            if status is not None:
+                self.status_counts[status] = self.status_counts.get(status, 0) + 1
+            if error is not None:
+                self.error_counts[error] = self.error_counts.get(error, 0) + 1
+
+    def _claim(self):
+        """Reserve the next request slot, returning False once the run is complete"""
+        if self._stop_event.is_set():
+            return False
+        if self.duration is not None and time.perf_counter() - self._start_time >= self.duration:
+            return False
+        with self._lock:
+            if self.total is not None and self.started >= self.total:
+                return False
+            self.started += 1
+        return True
+
+    def _run_open_loop(self):
+        interval = 1.0 / self.rps
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            i = 0
+            while True:
+                intended_time = self._start_time + i * interval
+                if self.duration is not None and intended_time - self._start_time >= self.duration:
+                    break
+                delay = intended_time - time.perf_counter()
+                if delay > 0 and self._stop_event.wait(delay):
+                    break
+                if not self._claim():
+                    break
+                executor.submit(self._send_one, intended_time)
+                i += 1
+
+    def _run_closed_loop(self):
+        def worker():
+            while self._claim():
+                self._send_one(time.perf_counter())
+
+        threads = [threading.Thread(target=worker, daemon=True) for _ in range(self.concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def run(self):
+        """Run the test in the calling thread and return the report dict"""
+        self._start_time = time.perf_counter()
+        if self.rps is not None:
+            self._run_open_loop()
+        else:
+            self._run_closed_loop()
+        self._end_time = time.perf_counter()
+        return self.report()
+
+    def report(self):
+        """Machine-readable results (latencies in seconds)"""
+        elapsed = self.elapsed()
+        with self._lock:
+            return {
+                "method": self.method,
+                "url": self.url,
+                "mode": "open-loop" if self.rps is not None else "closed-loop",
+                "target_rps": self.rps,
+                "concurrency": self.concurrency,
+                "requests": self.completed,
+                "duration": round(elapsed, 6),
+                "throughput": round(self.completed / elapsed, 3) if elapsed > 0 else None,
+                "latency": self.latency.summary(),
+                "service_time": self.service_time.summary(),
+                "status_codes": {str(k): v for k, v in sorted(self.status_counts.items())},
+                "errors": dict(sorted(self.error_counts.items()))
+            }
+
+
+def format_outcome(latency, status_codes, errors):
+    """Latency percentile, status code and error lines shared by the load test and dataset run summaries"""
+    lines = []
+    if latency.get("count"):
+        lines.append(
+            f"Latency p50: {format_ms(latency['p50'])} | p90: {format_ms(latency['p90'])} | "
+            f"p99: {format_ms(latency['p99'])} | max: {format_ms(latency['max'])}"
+        )
+    if status_codes:
+        lines.append("Status codes: " + ", ".join(f"{k}: {v}" for k, v in status_codes.items()))
+    if errors:
+        lines.append("Errors: " + ", ".join(f"{k}: {v}" for k, v in errors.items()))
+    else:
+        lines.append("Errors: none")
+    return lines
+
+
+def format_report(report):
+    """Human-readable multi-line summary of a report produced by LoadTest.report"""
+    lines = [
+        f"{report['method']} {report['url']}",
+        f"Mode: {report['mode']}"
+        + (f" | Target: {report['target_rps']} req/s" if report["target_rps"] else "")
+        + f" | Concurrency: {report['concurrency']}",
+        f"Requests: {report['requests']} | Duration: {report['duration']:.2f} sec"
+        + (f" | Throughput: {report['throughput']:.1f} req/s" if report["throughput"] else ""),
+    ]
+    lines += format_outcome(report["latency"], report["status_codes"], report["errors"])
+    return "\n".join(lines)
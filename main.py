@@ -1,13 +1,36 @@
+import sys
+
+if __name__ == "__main__" and len(sys.argv) > 1:
+    # Commands are handled by cli.py before anything GUI is imported, so they work without Tk or a display
+    from cli import build_arg_parser
+
+    args = build_arg_parser().parse_args()
+    if args.command:
+        sys.exit(args.handler(args))
+
 import customtkinter as ctk
 import tkinter as tk
-from tkinter import ttk, messagebox
-import requests
+from tkinter import ttk, messagebox, filedialog
 import json
-import time
-import os
 import threading
-import re
+import os
 from datetime import datetime
+from http_client import (SessionPool, DEFAULT_SETTINGS, prepare_send, prepare_request, format_bytes, request_timeout,
+                         format_timings, STREAM_MEMORY_LIMIT)
+from request_queue import RequestExecutor
+from response_cache import ResponseCache, DEFAULT_CACHE_SETTINGS
+from sender import RequestSender
+from mapped_text import MappedText
+from extractors import parse_extractors
+from text_viewer import PagedTextViewer
+from run_dialog import RunDialog
+from load_test import LoadTest, format_report
+from history_store import HistoryStore, DEFAULT_HISTORY_SETTINGS, format_timing_summary
+from variables import compile_request, UndefinedVariableError
+from request_store import load_request_file, RequestFileWriter, RequestIndex, ensure_request_ids, new_request_id
+
+MAX_VISIBLE_REQUESTS = 1000  # Rows shown in the request list at once (use the search box to narrow down)
+SEARCH_DELAY_MS = 150  # Delay after the last keystroke before the request list is filtered
 
 class EZHttpRequestCheckerApp(ctk.CTk):
     def __init__(self):
@@ -19,21 +42,50 @@ class EZHttpRequestCheckerApp(ctk.CTk):
 
         self.fixedfont = ctk.CTkFont(family="Consolas", size=12)
 
-        # Folder for history files and file for saved requests/global variables
+        # Folder for the history database and file for saved requests/global variables
         self.history_folder = "history"
         self.request_file = "saved_requests.json"
 
         # Each request is a dict: {"method": ..., "description": ..., "url": ..., "headers": ..., "body": ...}
         self.saved_requests = []
         self.variable_dict = {}  # Global dictionary for variables (common to all requests)
-        self.load_requests()  # Load saved requests and global variables from file
-
-        self.current_request_index = None  # Currently selected request (None if none selected)
+        self.extracted_variables = {}  # Values extracted from responses; they override globals and are never saved
+        self.settings = dict(DEFAULT_SETTINGS)  # Connection settings (pool size, idle eviction, retries)
+        self.settings.update(DEFAULT_HISTORY_SETTINGS)  # History retention settings
+        self.settings.update(DEFAULT_CACHE_SETTINGS)  # Conditional-request cache settings
+        # Saved requests are loaded in the background after the window is built (see load_requests);
+        # changes are written by a background writer (see save_requests)
+        self.requests_loaded = False
+        self.request_writer = RequestFileWriter(self.request_file)
+
+        # Keep-alive sessions shared by all sends, keyed by scheme/host/port (recreated once settings are loaded)
+        self.session_pool = SessionPool.from_settings(self.settings)
+        # Bounded pool of workers for sends (recreated once settings are loaded); shown in the queue panel
+        self.request_executor = RequestExecutor(self.settings["max_parallel_sends"], on_change=self.on_job_changed)
+        # Indexed history of sent requests and responses; retention runs in the background once settings are loaded
+        self.history_store = HistoryStore.from_settings(self.history_folder, self.settings)
+        # Validators and bodies of GET responses, to revalidate repeated sends instead of downloading them again
+        self.response_cache = ResponseCache.from_settings(os.path.join(self.history_folder, "response_cache"), self.settings)
+        # GUI-free send pipeline used by the Send button (recreated with the session pool)
+        self.sender = RequestSender(self.session_pool, self.history_store, self.response_cache, texts=self.ui_texts)
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+
+        self.current_request_id = None  # Stable id of the selected request (None if none selected)
+        self.requests_by_id = {}  # Request id -> request dict
+        self.request_index = RequestIndex()  # Search index over method, description and URL
+        self.visible_request_ids = []  # Request ids currently shown in the treeview, in display order
+        self.search_after_id = None
 
         # Left pane: Saved requests list (Treeview)
         self.left_frame = ctk.CTkFrame(self, width=250)
         self.left_frame.pack(side="left", fill="y", padx=5, pady=5)
 
+        self.search_entry = ctk.CTkEntry(self.left_frame, placeholder_text=self.ui_texts.get("request_search_placeholder", "Search method, description, URL"))
+        self.search_entry.pack(fill="x", padx=5, pady=(5, 0))
+        self.search_entry.bind("<KeyRelease>", self.on_search_changed)
+        self.request_count_label = ctk.CTkLabel(self.left_frame, text="")
+        self.request_count_label.pack(anchor="w", padx=5)
+
         self.request_tree = ttk.Treeview(
             self.left_frame,
             columns=("method", "description", "url"),
@@ -55,6 +107,25 @@ class EZHttpRequestCheckerApp(ctk.CTk):
         self.delete_button = ctk.CTkButton(self.left_frame, text=self.ui_texts.get("delete_button", "Delete"), command=self.delete_request)
         self.delete_button.pack(padx=5, pady=5, fill="x")
 
+        # Queue panel: requests waiting or in flight, with cancel
+        self.queue_label = ctk.CTkLabel(self.left_frame, text=self.ui_texts.get("queue_label", "Request Queue"))
+        self.queue_label.pack(anchor="w", padx=5)
+        self.queue_tree = ttk.Treeview(self.left_frame, columns=("state", "request", "detail"), show="headings", selectmode="browse", height=6)
+        self.queue_tree.heading("state", text=self.ui_texts.get("queue_column_state", "State"))
+        self.queue_tree.heading("request", text=self.ui_texts.get("queue_column_request", "Request"))
+        self.queue_tree.heading("detail", text=self.ui_texts.get("queue_column_detail", "Progress"))
+        self.queue_tree.column("state", width=70, anchor="w")
+        self.queue_tree.column("request", width=180, anchor="w")
+        self.queue_tree.column("detail", width=130, anchor="w")
+        self.queue_tree.pack(fill="x", padx=5, pady=5)
+        self.queue_tree.bind("<Double-1>", self.on_queue_open)
+        self.queue_button_frame = ctk.CTkFrame(self.left_frame, fg_color="transparent")
+        self.queue_button_frame.pack(fill="x", padx=5, pady=(0, 5))
+        self.cancel_job_button = ctk.CTkButton(self.queue_button_frame, text=self.ui_texts.get("cancel_button", "Cancel"), command=self.cancel_selected_job)
+        self.cancel_job_button.pack(side="left", expand=True, fill="x", padx=(0, 2))
+        self.clear_jobs_button = ctk.CTkButton(self.queue_button_frame, text=self.ui_texts.get("clear_finished_button", "Clear Finished"), command=self.clear_finished_jobs)
+        self.clear_jobs_button.pack(side="left", expand=True, fill="x", padx=(2, 0))
+
         # Right pane: Tab view for Request and Variables
         self.right_frame = ctk.CTkFrame(self)
         self.right_frame.pack(side="left", fill="both", expand=True, padx=5, pady=5)
@@ -63,6 +134,7 @@ class EZHttpRequestCheckerApp(ctk.CTk):
         self.tabview.pack(fill="both", expand=True, padx=5, pady=5)
         self.request_tab = self.tabview.add(self.ui_texts.get("request_tab", "Request"))
         self.variables_tab = self.tabview.add(self.ui_texts.get("variables_tab", "Variables"))
+        self.history_tab = self.tabview.add(self.ui_texts.get("history_tab", "History"))
 
         # Request Tab
         self.description_frame = ctk.CTkFrame(self.request_tab)
@@ -71,6 +143,9 @@ class EZHttpRequestCheckerApp(ctk.CTk):
         self.description_label.pack(anchor="w", padx=5)
         self.description_entry = ctk.CTkEntry(self.description_frame, placeholder_text=self.ui_texts.get("request_description_placeholder", "Enter request description"))
         self.description_entry.pack(fill="x", padx=5, pady=5)
+        # Shows undefined variables of the loaded request (detected when it is loaded, before sending)
+        self.variable_warning_label = ctk.CTkLabel(self.description_frame, text="", text_color="orange")
+        self.variable_warning_label.pack(anchor="w", padx=5)
 
         self.top_frame = ctk.CTkFrame(self.request_tab)
         self.top_frame.pack(fill="x", padx=5, pady=5)
@@ -85,6 +160,23 @@ class EZHttpRequestCheckerApp(ctk.CTk):
         self.url_entry.pack(side="left", fill="x", expand=True, padx=(0, 5))
         self.send_button = ctk.CTkButton(self.top_frame, text=self.ui_texts.get("send_button", "Send"), command=self.send_request)
         self.send_button.pack(side="left")
+        self.load_test_button = ctk.CTkButton(self.top_frame, text=self.ui_texts.get("load_test_button", "Load Test"), width=90, command=self.open_load_test_dialog)
+        self.load_test_button.pack(side="left", padx=(5, 0))
+        self.dataset_button = ctk.CTkButton(self.top_frame, text=self.ui_texts.get("dataset_button", "Dataset"), width=80, command=self.open_dataset_dialog)
+        self.dataset_button.pack(side="left", padx=(5, 0))
+
+        self.timeout_frame = ctk.CTkFrame(self.request_tab, fg_color="transparent")
+        self.timeout_frame.pack(fill="x", padx=5)
+        self.timeout_label = ctk.CTkLabel(self.timeout_frame, text=self.ui_texts.get("timeout_label", "Timeout (sec)"))
+        self.timeout_label.pack(side="left", padx=(0, 5))
+        self.connect_timeout_entry = ctk.CTkEntry(self.timeout_frame, width=110, placeholder_text=self.ui_texts.get("connect_timeout_placeholder", "Connect"))
+        self.connect_timeout_entry.pack(side="left", padx=(0, 5))
+        self.read_timeout_entry = ctk.CTkEntry(self.timeout_frame, width=110, placeholder_text=self.ui_texts.get("read_timeout_placeholder", "Read"))
+        self.read_timeout_entry.pack(side="left")
+        self.use_cache_var = ctk.BooleanVar(value=bool(self.settings["response_cache_enabled"]))
+        self.use_cache_check = ctk.CTkCheckBox(self.timeout_frame, text=self.ui_texts.get("use_cache_label", "Revalidate GETs with local cache (ETag / Last-Modified)"),
+                                               variable=self.use_cache_var, command=self.on_use_cache_changed)
+        self.use_cache_check.pack(side="left", padx=(15, 0))
 
         self.headers_label = ctk.CTkLabel(self.request_tab, text=self.ui_texts.get("http_headers_label", "HTTP Headers (key: value per line)"))
         self.headers_label.pack(anchor="w", padx=5, pady=(10, 0))
@@ -96,8 +188,18 @@ class EZHttpRequestCheckerApp(ctk.CTk):
         self.body_textbox = ctk.CTkTextbox(self.request_tab, height=150, font=self.fixedfont)
         self.body_textbox.pack(fill="both", padx=5, pady=5, expand=True)
 
+        self.extract_label = ctk.CTkLabel(self.request_tab, text=self.ui_texts.get("extract_label", "Extract variables (variable = json:$.path | regex:pattern | header:Name, one per line)"))
+        self.extract_label.pack(anchor="w", padx=5, pady=(10, 0))
+        self.extract_textbox = ctk.CTkTextbox(self.request_tab, height=50, font=self.fixedfont)
+        self.extract_textbox.pack(fill="x", padx=5, pady=5)
+
         self.response_info_label = ctk.CTkLabel(self.request_tab, text=self.ui_texts.get("response_label", "Response: "))
         self.response_info_label.pack(anchor="w", padx=5, pady=(10, 0))
+        # Phase breakdown of the last send, and percentiles over recent sends of the same request
+        self.timing_label = ctk.CTkLabel(self.request_tab, text="", font=self.fixedfont)
+        self.timing_label.pack(anchor="w", padx=5)
+        self.timing_summary_label = ctk.CTkLabel(self.request_tab, text="", font=self.fixedfont)
+        self.timing_summary_label.pack(anchor="w", padx=5)
         self.response_textbox = ctk.CTkTextbox(self.request_tab, height=150, font=self.fixedfont)
         self.response_textbox.pack(fill="both", padx=5, pady=5, expand=True)
 
@@ -117,13 +219,42 @@ class EZHttpRequestCheckerApp(ctk.CTk):
         self.variables_tree.column("name", width=150, anchor="w")
         self.variables_tree.column("value", width=150, anchor="w")
         self.variables_tree.pack(fill="both", expand=True, padx=5, pady=5)
+        self.variables_tree.tag_configure("extracted", foreground="gray")
         self.variables_tree.bind("<<TreeviewSelect>>", self.on_variable_select)
 
         self.delete_variable_button = ctk.CTkButton(self.variables_tab, text=self.ui_texts.get("delete_variable_button", "Delete Variable"), command=self.delete_variable)
         self.delete_variable_button.pack(padx=5, pady=(0, 5))
 
-        self.refresh_request_list()
-        self.refresh_variables_table()
+        # History Tab
+        self.history_filter_frame = ctk.CTkFrame(self.history_tab)
+        self.history_filter_frame.pack(fill="x", padx=5, pady=5)
+        self.history_url_entry = ctk.CTkEntry(self.history_filter_frame, placeholder_text=self.ui_texts.get("history_url_placeholder", "URL starts with"))
+        self.history_url_entry.pack(side="left", fill="x", expand=True, padx=(5, 2))
+        self.history_status_entry = ctk.CTkEntry(self.history_filter_frame, width=80, placeholder_text=self.ui_texts.get("history_status_placeholder", "Status"))
+        self.history_status_entry.pack(side="left", padx=2)
+        self.history_request_only_var = ctk.BooleanVar(value=False)
+        self.history_request_only_check = ctk.CTkCheckBox(self.history_filter_frame, text=self.ui_texts.get("history_request_only", "Selected request only"), variable=self.history_request_only_var)
+        self.history_request_only_check.pack(side="left", padx=5)
+        self.history_search_button = ctk.CTkButton(self.history_filter_frame, text=self.ui_texts.get("history_search_button", "Search"), width=80, command=self.refresh_history_table)
+        self.history_search_button.pack(side="left", padx=5)
+
+        self.history_tree = ttk.Treeview(self.history_tab, columns=("time", "status", "method", "url", "body"), show="headings", selectmode="browse")
+        self.history_tree.heading("time", text=self.ui_texts.get("history_column_time", "Time"))
+        self.history_tree.heading("status", text=self.ui_texts.get("history_column_status", "Status"))
+        self.history_tree.heading("method", text=self.ui_texts.get("tree_heading_method", "Method"))
+        self.history_tree.heading("url", text=self.ui_texts.get("tree_heading_url", "URL"))
+        self.history_tree.heading("body", text=self.ui_texts.get("history_column_body", "Body"))
+        self.history_tree.column("time", width=150, anchor="w")
+        self.history_tree.column("status", width=60, anchor="w")
+        self.history_tree.column("method", width=70, anchor="w")
+        self.history_tree.column("url", width=400, anchor="w")
+        self.history_tree.column("body", width=90, anchor="w")
+        self.history_tree.pack(fill="both", expand=True, padx=5, pady=5)
+        self.history_tree.bind("<Double-1>", self.on_history_open)
+
+        self.refresh_history_table()
+        self.set_editing_enabled(False)
+        self.load_requests()  # Load saved requests and global variables from file
 
     def load_ui_texts(self):
         """Load UI display texts from ui_lang.json"""
@@ -136,23 +267,59 @@ class EZHttpRequestCheckerApp(ctk.CTk):
 
     def load_requests(self):
         """
-        Load saved requests and global variables from file.
+        Load saved requests and global variables from file in a background thread, so the window appears
+        before a large collection is parsed. Editing is enabled once loading has finished.
         The file structure is:
         {
           "requests": [ ... ],
-          "global_variables": { ... }
+          "global_variables": { ... },
+          "settings": { ... }
         }
         """
-        if os.path.exists(self.request_file):
+        def thread_func():
             try:
-                with open(self.request_file, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    self.saved_requests = data.get("requests", [])
-                    self.variable_dict = data.get("global_variables", {})
+                data = load_request_file(self.request_file)
             except Exception as e:
                 print("Error loading requests:", e)
-                self.saved_requests = []
-                self.variable_dict = {}
+                data = {"requests": [], "global_variables": {}, "settings": {}}
+            # Requests saved by older versions get stable ids; the index is built off the UI thread as well
+            data["ids_added"] = ensure_request_ids(data["requests"])
+            index = RequestIndex()
+            index.rebuild(data["requests"])
+            self.after(0, lambda: self.on_requests_loaded(data, index))
+
+        threading.Thread(target=thread_func, daemon=True).start()
+
+    def on_requests_loaded(self, data, index):
+        """Apply the loaded file contents and enable editing"""
+        self.saved_requests = data["requests"]
+        self.requests_by_id = {req["id"]: req for req in self.saved_requests}
+        self.request_index = index
+        self.variable_dict = data["global_variables"]
+        self.settings.update(data["settings"])
+        self.session_pool.close()
+        self.session_pool = SessionPool.from_settings(self.settings)
+        self.sender = RequestSender(self.session_pool, self.history_store, self.response_cache, texts=self.ui_texts)
+        self.request_executor.shutdown()
+        self.request_executor = RequestExecutor(int(self.settings["max_parallel_sends"]), on_change=self.on_job_changed)
+        self.history_store.max_age_days = self.settings["history_max_age_days"]
+        self.history_store.max_size_mb = self.settings["history_max_size_mb"]
+        threading.Thread(target=self.history_store.apply_retention, daemon=True).start()
+        self.response_cache.max_size_mb = self.settings["response_cache_max_size_mb"]
+        self.use_cache_var.set(bool(self.settings["response_cache_enabled"]))
+        self.requests_loaded = True
+        self.refresh_request_list()
+        self.refresh_variables_table()
+        self.set_editing_enabled(True)
+        if data["ids_added"]:
+            self.save_requests()
+
+    def set_editing_enabled(self, enabled):
+        """Enable or disable the buttons that change saved requests or variables"""
+        state = "normal" if enabled else "disabled"
+        for button in (self.new_button, self.delete_button, self.send_button, self.load_test_button,
+                       self.dataset_button, self.add_variable_button, self.delete_variable_button):
+            button.configure(state=state)
 
     def save_requests(self):
         """
@@ -160,47 +327,84 @@ class EZHttpRequestCheckerApp(ctk.CTk):
         using the following structure:
         {
           "requests": [ ... ],
-          "global_variables": { ... }
+          "global_variables": { ... },
+          "settings": { ... }
         }
+        The write happens in the background: changes made in quick succession are coalesced, and the file
+        is replaced atomically.
         """
-        data = {
-            "requests": self.saved_requests,
-            "global_variables": self.variable_dict
-        }
-        try:
-            with open(self.request_file, "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False, indent=4)
-        except Exception as e:
-            print("Error saving requests:", e)
+        if not self.requests_loaded:
+            return
+        self.request_writer.schedule(self.saved_requests, self.variable_dict, self.settings)
+
+    def on_close(self):
+        """Cancel queued requests, write pending changes and close pooled connections before the window is destroyed"""
+        self.request_executor.shutdown()
+        self.request_writer.close()
+        self.session_pool.close()
+        self.history_store.close()
+        self.response_cache.close()
+        self.destroy()
+
+    @staticmethod
+    def request_row(req):
+        return (req.get("method", "GET"), req.get("description", ""), req.get("url", "No URL"))
 
     def refresh_request_list(self):
-        """Redraw the request list in the treeview"""
-        for item in self.request_tree.get_children():
-            self.request_tree.delete(item)
-        for index, req in enumerate(self.saved_requests):
-            method = req.get("method", "GET")
-            description = req.get("description", "")
-            url = req.get("url", "No URL")
-            self.request_tree.insert("", "end", iid=str(index), values=(method, description, url))
+        """
+        Bring the request list in the treeview in line with the search box.
+        Only the difference to the rows already shown is applied, so unchanged rows (and the selection) are kept.
+        At most MAX_VISIBLE_REQUESTS rows are shown; refine the search to find others.
+        """
+        matched, total = self.request_index.search(self.search_entry.get(), limit=MAX_VISIBLE_REQUESTS)
+        matched_set = set(matched)
+        removed = [req_id for req_id in self.visible_request_ids if req_id not in matched_set]
+        if removed:
+            self.request_tree.delete(*removed)
+        shown = set(self.visible_request_ids) - set(removed)
+        # Both lists follow the saved requests order, so inserting the missing rows at their position keeps the order
+        for position, req_id in enumerate(matched):
+            if req_id not in shown:
+                self.request_tree.insert("", position, iid=req_id, values=self.request_row(self.requests_by_id[req_id]))
+        self.visible_request_ids = matched
+        if total > len(matched):
+            count_text = self.ui_texts.get("request_count_limited", "Showing {shown} of {total}").format(shown=len(matched), total=total)
+        else:
+            count_text = self.ui_texts.get("request_count", "{total} requests").format(total=total)
+        self.request_count_label.configure(text=count_text)
+
+    def on_search_changed(self, event=None):
+        """Filter the request list shortly after the user stops typing"""
+        if self.search_after_id is not None:
+            self.after_cancel(self.search_after_id)
+        self.search_after_id = self.after(SEARCH_DELAY_MS, self.apply_search)
+
+    def apply_search(self):
+        self.search_after_id = None
+        self.refresh_request_list()
 
     def refresh_variables_table(self):
-        """Refresh the variables table in the Variables tab using self.variable_dict"""
+        """Refresh the variables table in the Variables tab (extracted values are shown greyed out)"""
         for item in self.variables_tree.get_children():
             self.variables_tree.delete(item)
-        for var_name, var_value in self.variable_dict.items():
-            self.variables_tree.insert("", "end", values=(var_name, var_value))
+        for var_name, var_value in self.send_variables().items():
+            tags = ("extracted",) if var_name in self.extracted_variables else ()
+            self.variables_tree.insert("", "end", values=(var_name, var_value), tags=tags)
+
+    def send_variables(self):
+        """Variables used for sending: the global variables overlaid with the values extracted in this session"""
+        return {**self.variable_dict, **self.extracted_variables}
 
     def on_tree_select(self, event):
         """When a request is selected in the treeview, load its details into the editing areas"""
         selected_item = self.request_tree.selection()
-        if selected_item:
-            index = int(selected_item[0])
-            self.load_request(index)
+        if selected_item and selected_item[0] != self.current_request_id:
+            self.load_request(selected_item[0])
 
-    def load_request(self, index):
+    def load_request(self, req_id):
         """Load the selected saved request into the editing areas (global variables remain unchanged)"""
-        self.current_request_index = index
-        req = self.saved_requests[index]
+        self.current_request_id = req_id
+        req = self.requests_by_id[req_id]
         self.method_var.set(req.get("method", "GET"))
         self.description_entry.delete(0, "end")
         self.description_entry.insert(0, req.get("description", ""))
@@ -210,24 +414,75 @@ class EZHttpRequestCheckerApp(ctk.CTk):
         self.headers_textbox.insert("1.0", req.get("headers", ""))
         self.body_textbox.delete("1.0", "end")
         self.body_textbox.insert("1.0", req.get("body", ""))
+        self.extract_textbox.delete("1.0", "end")
+        self.extract_textbox.insert("1.0", req.get("extract", ""))
+        self.set_timeout_entries(req)
+        self.check_undefined_variables()
+        self.timing_label.configure(text="")
+        self.refresh_timing_summary()
+
+    def refresh_timing_summary(self):
+        """Show the phase percentiles of recent sends of the current request (from the history store)"""
+        if self.current_request_id is None:
+            self.timing_summary_label.configure(text="")
+            return
+        summary = self.history_store.timing_summary(self.current_request_id)
+        self.timing_summary_label.configure(text=format_timing_summary(summary))
+
+    def get_timeout_entries(self):
+        """Return the timeouts entered for the request as a dict (raises ValueError if not numbers)"""
+        return {
+            key: float(entry.get().strip())
+            for key, entry in (("connect_timeout", self.connect_timeout_entry), ("read_timeout", self.read_timeout_entry))
+            if entry.get().strip()
+        }
+
+    def set_timeout_entries(self, req):
+        """Show the request's own timeouts; empty entries use the defaults from settings"""
+        for key, entry in (("connect_timeout", self.connect_timeout_entry), ("read_timeout", self.read_timeout_entry)):
+            entry.delete(0, "end")
+            if req.get(key):
+                entry.insert(0, str(req[key]))
+
+    def on_use_cache_changed(self):
+        """Turn the conditional-request cache on or off for all requests (saved in settings)"""
+        self.settings["response_cache_enabled"] = self.use_cache_var.get()
+        self.save_requests()
+
+    def check_undefined_variables(self):
+        """Show the undefined variables referenced by the loaded request, if any"""
+        undefined = []
+        if self.current_request_id is not None:
+            undefined = compile_request(self.requests_by_id[self.current_request_id]).undefined(self.send_variables())
+        if undefined:
+            text = self.ui_texts.get("undefined_variable_error", "Undefined variable: ") + ", ".join(undefined)
+        else:
+            text = ""
+        self.variable_warning_label.configure(text=text)
 
     def new_request(self):
         """Create a new request by clearing the editing areas and deselecting any current selection"""
-        self.current_request_index = None
+        self.current_request_id = None
         self.method_var.set("GET")
         self.description_entry.delete(0, "end")
         self.url_entry.delete(0, "end")
         self.headers_textbox.delete("1.0", "end")
         self.body_textbox.delete("1.0", "end")
+        self.extract_textbox.delete("1.0", "end")
+        self.set_timeout_entries({})
         self.response_textbox.delete("1.0", "end")
         self.response_info_label.configure(text=self.ui_texts.get("response_label", "Response: "))
+        self.timing_label.configure(text="")
+        self.timing_summary_label.configure(text="")
         self.request_tree.selection_remove(self.request_tree.selection())
 
     def delete_request(self):
         """Delete the selected request and update the file"""
-        if self.current_request_index is not None:
-            del self.saved_requests[self.current_request_index]
-            self.current_request_index = None
+        if self.current_request_id is not None:
+            req = self.requests_by_id.pop(self.current_request_id)
+            self.saved_requests.remove(req)
+            self.request_index.remove(req["id"])
+            self.current_request_id = None
             self.refresh_request_list()
             self.new_request()
             self.save_requests()
@@ -240,10 +495,13 @@ class EZHttpRequestCheckerApp(ctk.CTk):
             messagebox.showerror("Error", "Variable name is required!")
             return
         self.variable_dict[var_name] = var_value
+        # Adding an extracted variable saves it; the entered value replaces the extracted one
+        self.extracted_variables.pop(var_name, None)
         self.refresh_variables_table()
         self.variable_name_entry.delete(0, "end")
         self.variable_value_entry.delete(0, "end")
         self.save_requests()  # Save global variables immediately
+        self.check_undefined_variables()
 
     def delete_variable(self):
         """Delete the selected variable from the variables table"""
@@ -251,10 +509,13 @@ class EZHttpRequestCheckerApp(ctk.CTk):
         if selected:
             item = self.variables_tree.item(selected[0])
             var_name = item["values"][0]
-            if var_name in self.variable_dict:
+            if var_name in self.extracted_variables:
+                del self.extracted_variables[var_name]
+            elif var_name in self.variable_dict:
                 del self.variable_dict[var_name]
             self.refresh_variables_table()
             self.save_requests()  # Save changes immediately
+            self.check_undefined_variables()
 
     def on_variable_select(self, event):
         """When a variable is clicked in the variables table, update the input fields with its data"""
@@ -268,78 +529,225 @@ class EZHttpRequestCheckerApp(ctk.CTk):
                 self.variable_value_entry.delete(0, "end")
                 self.variable_value_entry.insert(0, values[1])
 
-    def substitute_variables(self, text):
+    def substitute_variables(self, req):
+        """
+        Replace all occurrences of {{variable}} in the URL, headers and body of the request with the values from
+        send_variables() and return the prepared request (see http_client.prepare_send).
+        If a variable value is in the format [filename], load the content from the corresponding file in the 'variables' folder;
+        a body consisting of just such a variable is streamed from the file instead.
+        The templates are compiled once, so undefined variables are reported before any file is read.
         """
-        Replace all occurrences of {{variable}} in the text with the value from self.variable_dict.
-        If a variable value is in the format [filename], load the content from the corresponding file in the 'variables' folder.
+        def on_file_error(filename, e):
+            messagebox.showerror("Error", f"Error reading file {filename}: {e}")
+
+        variables = self.send_variables()
+        compiled = compile_request(req)
+        undefined = compiled.undefined(variables)
+        if undefined:
+            messagebox.showerror("Error", self.ui_texts.get("undefined_variable_error", "Undefined variable: ") + ", ".join(undefined))
+            raise UndefinedVariableError(undefined[0])
+        return prepare_send(req, variables, on_file_error=on_file_error)
+
+    def open_history_entry(self, entry_id):
         """
-        pattern = r"\{\{\s*(\w+)\s*\}\}"
-
-        def replacer(match):
-            var_name = match.group(1)
-            if var_name in self.variable_dict:
-                var_value = self.variable_dict[var_name]
-                # Check if variable value is in the format [filename]
-                if re.fullmatch(r"\[.+\]", var_value):
-                    filename = var_value.strip("[]")
-                    filepath = os.path.join("variables", filename)
-                    if os.path.exists(filepath):
-                        try:
-                            with open(filepath, "r", encoding="utf-8") as f:
-                                content = f.read()
-                            return content
-                        except Exception as e:
-                            messagebox.showerror("Error", f"Error reading file {filename}: {e}")
-                            return var_value
-                    else:
-                        # If file is not found, return the original value
-                        return var_value
+        Open the given history entry in a new window to display the full response.
+        Large bodies are decompressed to a file once and memory-mapped, small ones are read into memory;
+        either way the viewer shows them page by page. Loading runs in the background.
+        """
+        def load():
+            try:
+                entry = self.history_store.get(entry_id)
+                if entry is None:
+                    self.after(0, lambda: messagebox.showerror("Error", "History entry not found!"))
+                    return
+                path = None
+                if entry["body_size"] > STREAM_MEMORY_LIMIT:
+                    path = self.history_store.body_path(entry_id)
+                if path is not None and os.path.exists(path):
+                    mapped = MappedText.from_file(path)
                 else:
-                    return str(var_value)
-            else:
-                raise ValueError(var_name)
+                    mapped = MappedText.from_text(self.history_store.read_body(entry_id))
+            except Exception as e:
+                message = f"Failed to open history entry: {e}"
+                self.after(0, lambda: messagebox.showerror("Error", message))
+                return
+            self.after(0, lambda: PagedTextViewer(
+                self, mapped, header_text=self.history_store.render_header(entry),
+                title=self.ui_texts.get("full_response_title", "Full Response"),
+                font=self.fixedfont, ui_texts=self.ui_texts
+            ))
+
+        threading.Thread(target=load, daemon=True).start()
+
+    def refresh_history_table(self):
+        """Show the newest history entries matching the filters of the History tab"""
+        status_text = self.history_status_entry.get().strip()
+        request_key = None
+        if self.history_request_only_var.get() and self.current_request_id is not None:
+            request_key = self.current_request_id
+        try:
+            entries = self.history_store.query(
+                request_key=request_key,
+                status=int(status_text) if status_text else None,
+                url_prefix=self.history_url_entry.get().strip() or None
+            )
+        except ValueError:
+            messagebox.showerror("Error", self.ui_texts.get("history_status_error", "Status must be a number"))
+            return
+        for item in self.history_tree.get_children():
+            self.history_tree.delete(item)
+        for entry in entries:
+            timestamp = datetime.fromtimestamp(entry["request_time"]).strftime("%Y-%m-%d %H:%M:%S")
+            status = entry["status"] if entry["status"] is not None else (self.ui_texts.get("history_error_status", "Error") if entry["error"] else "")
+            body = self.ui_texts.get("history_body_unchanged", "Unchanged") if entry["body_unchanged"] else ""
+            self.history_tree.insert("", "end", iid=str(entry["id"]), values=(timestamp, status, entry["method"], entry["url"], body))
+
+    def on_history_open(self, event):
+        """Open the double-clicked history entry"""
+        selected = self.history_tree.selection()
+        if selected:
+            self.open_history_entry(int(selected[0]))
 
+    def open_load_test_dialog(self):
+        """
+        Open a dialog to load test the request currently in the editing areas.
+        Variables are substituted once before the run; results are shown as a summary and as JSON.
+        """
+        req = {
+            "method": self.method_var.get().strip(),
+            "url": self.url_entry.get().strip(),
+            "headers": self.headers_textbox.get("1.0", "end").strip(),
+            "body": self.body_textbox.get("1.0", "end").strip()
+        }
+        if not req["url"]:
+            messagebox.showerror("Error", "URL is required!")
+            return
         try:
-            return re.sub(pattern, replacer, text)
-        except ValueError as e:
-            undefined_var = e.args[0]
-            messagebox.showerror("Error", self.ui_texts.get("undefined_variable_error", "Undefined variable: ") + undefined_var)
-            raise
-
-    def show_progress_dialog(self):
-        """Display a progress dialog in the center of the screen while sending the request"""
-        dialog = ctk.CTkToplevel(self)
-        dialog.title(self.ui_texts.get("progress_dialog_title", "Processing"))
-        window_width, window_height = 300, 100
-        screen_width = dialog.winfo_screenwidth()
-        screen_height = dialog.winfo_screenheight()
-        x = (screen_width // 2) - (window_width // 2)
-        y = (screen_height // 2) - (window_height // 2)
-        dialog.geometry(f"{window_width}x{window_height}+{x}+{y}")
-        dialog.resizable(False, False)
-        label = ctk.CTkLabel(dialog, text=self.ui_texts.get("progress_dialog_label", "Sending request..."))
-        label.pack(pady=(10, 5))
-        progressbar = ctk.CTkProgressBar(dialog, mode="indeterminate")
-        progressbar.pack(fill="x", padx=20, pady=5)
-        progressbar.start()
-        return dialog
-
-    def open_history_file(self, filepath):
-        """Open the given history file in a new window to display the full response."""
-        if not os.path.exists(filepath):
-            messagebox.showerror("Error", "History file not found!")
+            req.update(self.get_timeout_entries())
+        except ValueError:
+            messagebox.showerror("Error", self.ui_texts.get("timeout_error", "Timeouts must be numbers (seconds)"))
             return
-        top = ctk.CTkToplevel(self)
-        top.title(self.ui_texts.get("full_response_title", "Full Response"))
-        top.geometry("800x600")
-        text_box = ctk.CTkTextbox(top, font=self.fixedfont)
-        text_box.pack(fill="both", expand=True, padx=5, pady=5)
         try:
-            with open(filepath, "r", encoding="utf-8") as f:
-                content = f.read()
-            text_box.insert("1.0", content)
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to open file: {e}")
+            url, headers, send_kwargs = prepare_request(req, self.send_variables())
+        except UndefinedVariableError as e:
+            messagebox.showerror("Error", self.ui_texts.get("undefined_variable_error", "Undefined variable: ") + e.args[0])
+            return
+
+        def parse(key, cast):
+            text = dialog.value(key)
+            return cast(text) if text else None
+
+        def start():
+            try:
+                total = parse("total", int)
+                duration = parse("duration", float)
+                rps = parse("rps", float)
+                concurrency = parse("concurrency", int) or 10
+                session_pool = SessionPool.from_settings(self.settings, min_pool_size=concurrency)
+                test = LoadTest(session_pool, req["method"], url, headers, send_kwargs,
+                                total=total, duration=duration, rps=rps, concurrency=concurrency,
+                                timeout=request_timeout(req, self.settings))
+            except ValueError as e:
+                dialog.show_error(str(e))
+                return None
+
+            def work():
+                try:
+                    return test.run()
+                finally:
+                    session_pool.close()
+
+            return test, work
+
+        def finish(report):
+            return (f"{report['requests']} done | {report['duration']:.1f} sec",
+                    format_report(report) + "\n\n" + json.dumps(report, indent=4))
+
+        dialog = RunDialog(self, self.ui_texts.get("load_test_title", "Load Test"), "600x500", [
+            ("total", self.ui_texts.get("load_test_total_label", "Total requests"), "100"),
+            ("duration", self.ui_texts.get("load_test_duration_label", "Duration (sec, optional)"), ""),
+            ("rps", self.ui_texts.get("load_test_rps_label", "Target RPS (empty = closed loop)"), ""),
+            ("concurrency", self.ui_texts.get("load_test_concurrency_label", "Concurrency"), "10")
+        ], start, lambda test: f"{test.completed} done | {test.elapsed():.1f} sec", finish,
+            font=self.fixedfont, ui_texts=self.ui_texts)
+
+    def open_dataset_dialog(self):
+        """
+        Open a dialog to send the selected saved request once per row of a CSV/JSONL dataset.
+        The dataset file is attached to the request (saved with it); results are written to a JSONL file
+        row by row and an aggregate summary is shown at the end.
+        """
+        from dataset_runner import DatasetRun, iter_dataset, format_summary
+
+        if self.current_request_id is None:
+            messagebox.showerror("Error", self.ui_texts.get("dataset_no_request", "Select or send a saved request first"))
+            return
+        req_id = self.current_request_id
+        req = self.requests_by_id[req_id]
+
+        def default_output(dataset):
+            return os.path.splitext(dataset)[0] + ".results.jsonl" if dataset else ""
+
+        def browse():
+            path = filedialog.askopenfilename(parent=dialog, filetypes=[
+                ("Datasets", "*.csv *.tsv *.jsonl *.ndjson"), ("All files", "*.*")
+            ])
+            if path:
+                dialog.set_value("dataset", path)
+                dialog.set_value("output", default_output(path))
+
+        def start():
+            # The request may have been updated or deleted while the dialog was open
+            req = self.requests_by_id.get(req_id)
+            if req is None:
+                dialog.show_error(self.ui_texts.get("dataset_request_deleted", "The request has been deleted"))
+                return None
+            dataset = dialog.value("dataset")
+            output_path = dialog.value("output") or default_output(dataset)
+            try:
+                concurrency = int(dialog.value("concurrency") or 8)
+                rows = iter_dataset(dataset)
+                output = open(output_path, "w", encoding="utf-8")
+            except (OSError, ValueError) as e:
+                dialog.show_error(str(e))
+                return None
+            # Attach the dataset to the saved request so it is preselected next time
+            if req.get("dataset") != dataset:
+                req["dataset"] = dataset
+                self.save_requests()
+            session_pool = SessionPool.from_settings(self.settings, min_pool_size=concurrency)
+            run = DatasetRun(session_pool, self.saved_requests.index(req), req, rows, self.send_variables(),
+                             self.settings, output, concurrency=concurrency)
+
+            def work():
+                error = None
+                try:
+                    summary = run.run()
+                except (OSError, ValueError) as e:
+                    summary = run.summary()
+                    error = str(e)
+                finally:
+                    session_pool.close()
+                    output.close()
+                return summary, output_path, error
+
+            return run, work
+
+        def finish(result):
+            summary, output_path, error = result
+            text = format_summary(summary) + "\n\n" + json.dumps(summary, indent=4)
+            if error:
+                text = f"Dataset error: {error}\n\n" + text
+            return f"{summary['rows']} done | {output_path}", text
+
+        dialog = RunDialog(self, self.ui_texts.get("dataset_title", "Dataset Run"), "650x500", [
+            ("dataset", self.ui_texts.get("dataset_file_label", "Dataset (CSV/TSV/JSONL)"), req.get("dataset", "")),
+            ("output", self.ui_texts.get("dataset_output_label", "Results file (JSONL)"), default_output(req.get("dataset", ""))),
+            ("concurrency", self.ui_texts.get("load_test_concurrency_label", "Concurrency"), "8")
+        ], start, lambda run: f"{run.completed} done | OK: {run.ok} | Failed: {run.failed} | {run.elapsed():.1f} sec",
+            finish, font=self.fixedfont, ui_texts=self.ui_texts)
+        ctk.CTkButton(dialog.form, text=self.ui_texts.get("dataset_browse_button", "Browse..."), width=80,
+                      command=browse).grid(row=0, column=2, padx=5, pady=2)
 
     def send_request(self):
         """
@@ -347,16 +755,19 @@ class EZHttpRequestCheckerApp(ctk.CTk):
          - Save the current input (new or update) to file without performing variable substitution in the saved data.
          - Replace any occurrences of {{variable}} in the request URL, headers, and body with the defined variable values for sending.
            If an undefined variable is found, an error dialog is shown.
-         - Send the HTTP request using the substituted values.
-         - Show a progress dialog and display "Sending request..." in the response area while processing.
-         - After receiving the response, display the status info and (up to) the first 10000 characters of the response.
-         - Save the request and full response (with timestamps) to a history file.
+         - Queue the HTTP request on the request executor (several requests can be in flight; see the queue panel).
+           The request's connect/read timeouts apply, and it can be cancelled from the queue panel.
+         - After receiving the response, display the status info and (up to) the first 10000 characters of the response
+           if the request is still the one being edited.
+         - Save the request and full response (with timestamps) to the history store.
+         - GETs whose earlier response had an ETag/Last-Modified are revalidated; on 304 the body comes from the local cache.
         """
         method = self.method_var.get().strip()
         description = self.description_entry.get().strip()
         original_url = self.url_entry.get().strip()
         original_headers_text = self.headers_textbox.get("1.0", "end").strip()
         original_body_text = self.body_textbox.get("1.0", "end").strip()
+        extract_text = self.extract_textbox.get("1.0", "end").strip()
 
         if not original_url:
             self.response_textbox.delete("1.0", "end")
@@ -364,27 +775,26 @@ class EZHttpRequestCheckerApp(ctk.CTk):
             return
 
         try:
-            substituted_url = self.substitute_variables(original_url)
-            substituted_headers_text = self.substitute_variables(original_headers_text)
-            substituted_body_text = self.substitute_variables(original_body_text)
+            timeouts = self.get_timeout_entries()
+        except ValueError:
+            messagebox.showerror("Error", self.ui_texts.get("timeout_error", "Timeouts must be numbers (seconds)"))
+            return
+
+        try:
+            prepared = self.substitute_variables({"url": original_url, "headers": original_headers_text, "body": original_body_text})
         except ValueError:
             return
+        try:
+            extractors = parse_extractors(extract_text)
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return
+        substituted_url = prepared["url"]
 
         self.response_textbox.delete("1.0", "end")
         self.response_textbox.insert("1.0", self.ui_texts.get("sending_request", "Sending request..."))
         self.response_info_label.configure(text=self.ui_texts.get("response_label", "Response: "))
 
-        headers = {}
-        for line in substituted_headers_text.splitlines():
-            if ":" in line:
-                key, value = line.split(":", 1)
-                headers[key.strip()] = value.strip()
-
-        try:
-            json_body = json.loads(substituted_body_text) if substituted_body_text else None
-        except json.JSONDecodeError:
-            json_body = None
-
         # Save the current request using the original texts with placeholders.
         request_data = {
             "method": method,
@@ -393,92 +803,134 @@ class EZHttpRequestCheckerApp(ctk.CTk):
             "headers": original_headers_text,
             "body": original_body_text
         }
-        if self.current_request_index is None:
+        request_data.update(timeouts)
+        if extract_text:
+            request_data["extract"] = extract_text
+        if self.current_request_id is None:
+            request_data["id"] = new_request_id()
             self.saved_requests.append(request_data)
-            self.current_request_index = len(self.saved_requests) - 1
+            self.request_index.add(request_data)
         else:
-            self.saved_requests[self.current_request_index] = request_data
+            request_data["id"] = self.current_request_id
+            old_data = self.requests_by_id[self.current_request_id]
+            # Fields that are not edited in the request tab
+            for key in ("dataset", "depends_on"):
+                if key in old_data:
+                    request_data[key] = old_data[key]
+            self.saved_requests[self.saved_requests.index(old_data)] = request_data
+            self.request_index.update(request_data)
+        self.requests_by_id[request_data["id"]] = request_data
+        self.current_request_id = request_data["id"]
 
         self.refresh_request_list()
+        if self.request_tree.exists(request_data["id"]):
+            self.request_tree.item(request_data["id"], values=self.request_row(request_data))
+            self.request_tree.selection_set(request_data["id"])
         self.save_requests()
 
         request_time = datetime.now()
-        progress_dialog = self.show_progress_dialog()
-
-        def thread_func():
-            try:
-                start_time = time.time()
-                if json_body is not None:
-                    response = requests.request(method, substituted_url, headers=headers, json=json_body)
-                else:
-                    response = requests.request(method, substituted_url, headers=headers, data=substituted_body_text)
-                elapsed = time.time() - start_time
-
-                status_message = f"{response.status_code}"
-                if response.reason:
-                    status_message += f" {response.reason}"
-                info_text = f"Status: {status_message} | Time: {elapsed:.2f} sec"
-
-                try:
-                    response_json = response.json()
-                    response_pretty = json.dumps(response_json, indent=4, ensure_ascii=False)
-                except ValueError:
-                    response_pretty = response.text
-            except requests.exceptions.RequestException as e:
-                status_message = ""
-                if hasattr(e, 'response') and e.response is not None:
-                    status_message = f"{e.response.status_code}"
-                    if e.response.reason:
-                        status_message += f" {e.response.reason}"
-                info_text = "Response: Error"
-                response_pretty = "An error occurred"
-                if status_message:
-                    response_pretty += f"\nStatus: {status_message}"
-
-            # If the response body exceeds 10000 characters, display partially
-            if len(response_pretty) > 10000:
-                response_display = response_pretty[:10000] + "[Partially displayed]"
-            else:
-                response_display = response_pretty
-
-            response_time = datetime.now()
-
-            history_content = (
-                f"[Request Timestamp] {request_time.strftime('%Y-%m-%d %H:%M:%S')}\n"
-                f"Method: {method}\n"
-                f"Description: {description}\n"
-                f"URL: {substituted_url}\n"
-                f"Headers:\n{substituted_headers_text}\n"
-                f"Body:\n{substituted_body_text}\n\n"
-                f"[Response Timestamp] {response_time.strftime('%Y-%m-%d %H:%M:%S')}\n"
-                f"Response Info: {info_text}\n"
-                f"Response Body:\n{response_pretty}\n"
-            )
-            if not os.path.exists(self.history_folder):
-                os.makedirs(self.history_folder)
-            filename = os.path.join(self.history_folder, f"{response_time.strftime('%Y-%m-%d-%H-%M-%S')}.txt")
-            with open(filename, "w", encoding="utf-8") as f:
-                f.write(history_content)
+        request_key = request_data["id"]
+        timeout = request_timeout(request_data, self.settings)
+        variables = self.send_variables()  # Extractor expressions may use {{variables}}
+
+        def send_job(job):
+            job.check_cancelled()
+
+            def on_progress(received, total, seconds):
+                rate = received / seconds if seconds > 0 else 0
+                detail = format_bytes(received) + (f" / {format_bytes(total)}" if total else "") + f" | {format_bytes(rate)}/s"
+                self.request_executor.update(job, detail)
+
+            result = self.sender.send(method, description, prepared, request_key=request_key, timeout=timeout,
+                                      extractors=extractors, variable_dict=variables,
+                                      use_cache=self.settings["response_cache_enabled"], cancel_event=job.cancel_event,
+                                      on_progress=on_progress, request_time=request_time)
+            job.detail = result["detail"]
+            entry_id = result["entry_id"]
+            extracted = result["extracted"]
+            timings = result["timings"]
+            info_text = result["info"]
+            response_display = result["display"]
+            complete = result["complete"]
+
+            # If the response body exceeds 10000 characters (or was streamed to disk), display partially
+            partial = not complete
+            if partial:
+                response_display += "[Partially displayed]"
 
             def update_gui():
+                self.refresh_history_table()
+                if extracted:
+                    # Extracted values (often tokens) can be used by the next requests but are not written to the
+                    # saved requests file; adding one in the Variables tab saves it as a global variable
+                    self.extracted_variables.update(extracted)
+                    self.refresh_variables_table()
+                    self.check_undefined_variables()
+                # Another request may have been selected meanwhile; its result stays available in the queue panel
+                if self.current_request_id != request_key:
+                    return
                 self.response_info_label.configure(text=self.ui_texts.get("response_label", "Response: ") + info_text)
+                self.timing_label.configure(text=format_timings(timings) if timings else "")
+                self.refresh_timing_summary()
                 self.response_textbox.delete("1.0", "end")
                 self.response_textbox.insert("1.0", response_display)
-                progress_dialog.destroy()
-                # If the response body exceeds 10000 characters, ask if the user wants to display the full response
-                if len(response_pretty) > 10000:
+                # If the response body was displayed partially, ask if the user wants to display the full response
+                if partial:
                     answer = messagebox.askyesno(
                         self.ui_texts.get("confirmation_title", "Confirmation"),
                         self.ui_texts.get("full_response_prompt", "Do you want to display the full response body?")
                     )
                     if answer:
-                        self.open_history_file(filename)
+                        self.open_history_entry(entry_id)
             self.after(0, update_gui)
+            return {"entry_id": entry_id}
+
+        self.request_executor.submit(send_job, f"{method} {substituted_url}", request_id=request_key)
+
+    def on_job_changed(self, job):
+        """Called from any thread when a queued request changes; updates the queue panel on the Tk thread"""
+        self.after(0, lambda: self.update_queue_row(job))
+
+    def update_queue_row(self, job):
+        iid = str(job.id)
+        state = self.ui_texts.get(f"queue_state_{job.state}", job.state)
+        values = (state, job.label, job.detail)
+        if self.queue_tree.exists(iid):
+            self.queue_tree.item(iid, values=values)
+        elif job.id in self.request_executor.jobs:
+            self.queue_tree.insert("", "end", iid=iid, values=values)
+        if job.state == "cancelled" and job.request_id == self.current_request_id:
+            self.response_textbox.delete("1.0", "end")
+            self.response_textbox.insert("1.0", self.ui_texts.get("request_cancelled", "Request cancelled"))
 
-        threading.Thread(target=thread_func, daemon=True).start()
+    def cancel_selected_job(self):
+        """Cancel the request selected in the queue panel"""
+        selected = self.queue_tree.selection()
+        if selected:
+            self.request_executor.cancel(int(selected[0]))
 
-if __name__ == "__main__":
+    def clear_finished_jobs(self):
+        """Remove finished requests from the queue panel"""
+        for job_id in self.request_executor.remove_finished():
+            if self.queue_tree.exists(str(job_id)):
+                self.queue_tree.delete(str(job_id))
+
+    def on_queue_open(self, event):
+        """Open the history entry of a finished request double-clicked in the queue panel"""
+        selected = self.queue_tree.selection()
+        if selected:
+            job = self.request_executor.jobs.get(int(selected[0]))
+            if job is not None and job.result:
+                self.open_history_entry(job.result["entry_id"])
+
+
+def run_app():
+    """Start the GUI"""
     ctk.set_appearance_mode("System")
     ctk.set_default_color_theme("blue")
     app = EZHttpRequestCheckerApp()
     app.mainloop()
+
+
+if __name__ == "__main__":
+    run_app()
@@ -0,0 +1,179 @@
+import mmap
+import os
+import re
+import threading
+from array import array
+
+MAX_LINE_BYTES = 4096       # Longer lines (e.g. minified JSON) are split into several display lines
+INDEX_CHUNK_LINES = 50000   # Lines indexed per step before other threads get a chance to read the index
+SEARCH_WINDOW = 1024 * 1024  # Bytes scanned per step when searching backwards
+
+
+class MappedText:
+    """
+    Read-only UTF-8 text accessed by line without loading it into memory.
+    A file is memory-mapped; small texts can be given as bytes. Line start offsets are indexed
+    once (in a background thread with build_index_async) so any line can be read in O(1).
+    Lines longer than MAX_LINE_BYTES are split at a character boundary so a single huge line
+    never has to be decoded or displayed at once.
+    Indexing and searching may run on other threads; reading lines and close() belong to the owning thread.
+    """
+
+    def __init__(self, data, path=None):
+        self.data = data  # mmap or bytes; both support slicing, find and re
+        self.path = path
+        self.size = len(data)
+        self._offsets = array("q", [0])  # Start offset of every indexed line, plus the end of the last one
+        self._indexed = self.size == 0
+        self._lock = threading.Lock()
+        self._closed = False
+
+    @classmethod
+    def from_file(cls, path):
+        """Memory-map a file (an empty file is read as empty text)"""
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return cls(b"", path)
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ), path)
+
+    @classmethod
+    def from_text(cls, text):
+        return cls(text.encode("utf-8"))
+
+    def reopen(self):
+        """A new, independent MappedText over the same file or bytes (with its own index and lifetime)"""
+        if self.path is not None and isinstance(self.data, mmap.mmap):
+            return MappedText.from_file(self.path)
+        return MappedText(self.data, self.path)
+
+    def close(self):
+        """Unmap the file (waits for a running index step or search to finish)"""
+        with self._lock:
+            self._closed = True
+            if isinstance(self.data, mmap.mmap):
+                self.data.close()
+
+    @property
+    def indexed(self):
+        """True once the line index covers the whole text"""
+        return self._indexed
+
+    @property
+    def line_count(self):
+        """Number of lines indexed so far (all lines once indexed is True)"""
+        return len(self._offsets) - 1
+
+    def _line_end(self, start):
+        end = self.data.find(b"\n", start, start + MAX_LINE_BYTES)
+        if end != -1:
+            return end + 1
+        end = min(start + MAX_LINE_BYTES, self.size)
+        if end < self.size:
+            # Do not split a multi-byte character: back up over UTF-8 continuation bytes
+            boundary = end
+            while boundary > start and self.data[boundary] & 0xC0 == 0x80:
+                boundary -= 1
+            if boundary > start:
+                end = boundary
+        return end
+
+    def index_step(self, max_lines=INDEX_CHUNK_LINES):
+        """Index up to max_lines more lines; returns True when the whole text is indexed"""
+        with self._lock:
+            if self._indexed or self._closed:
+                return True
+            offsets = self._offsets
+            position = offsets[-1]
+            for _ in range(max_lines):
+                position = self._line_end(position)
+                offsets.append(position)
+                if position >= self.size:
+                    self._indexed = True
+                    break
+            return self._indexed
+
+    def build_index(self):
+        while not self.index_step():
+            pass
+
+    def ensure_indexed(self, offset):
+        """Index at least up to the line containing a byte offset"""
+        while not self._indexed and self._offsets[-1] <= offset:
+            self.index_step()
+
+    def build_index_async(self):
+        """Index the text in a background thread; lines become readable as they are indexed"""
+        thread = threading.Thread(target=self.build_index, daemon=True)
+        thread.start()
+        return thread
+
+    def line_offset(self, line):
+        """Byte offset where a line starts"""
+        return self._offsets[line]
+
+    def line_at_offset(self, offset):
+        """Index of the line containing a byte offset (within the indexed part)"""
+        offsets = self._offsets
+        low, high = 0, len(offsets) - 2
+        if high < 0:
+            return 0
+        while low < high:
+            middle = (low + high + 1) // 2
+            if offsets[middle] <= offset:
+                low = middle
+            else:
+                high = middle - 1
+        return low
+
+    def text(self, start, end):
+        """Decoded text between two byte offsets"""
+        if self._closed:
+            return ""
+        return self.data[start:end].decode("utf-8", errors="replace")
+
+    def lines(self, first, count):
+        """Decoded text of up to count lines starting at line first (line breaks included)"""
+        last = min(first + count, self.line_count)
+        if first >= last:
+            return ""
+        return self.text(self._offsets[first], self._offsets[last])
+
+    def run_locked(self, func, *args):
+        """Call func(data, *args) while the mapping is guaranteed to stay open (for other threads); None once closed"""
+        with self._lock:
+            if self._closed:
+                return None
+            return func(self.data, *args)
+
+    def compile_search(self, text, match_case=False):
+        """Compile a literal search text into a bytes pattern usable with search()"""
+        return re.compile(re.escape(text.encode("utf-8")), 0 if match_case else re.IGNORECASE)
+
+    def search(self, pattern, start=0, backwards=False):
+        """
+        Return (start, end) byte offsets of the next match of a compiled pattern at or after start,
+        or - with backwards - of the last match that ends at or before start. None if there is none.
+        Forward search runs directly on the mapped data; backward search scans fixed-size windows
+        from start towards the beginning, so neither reads the whole text into memory.
+        """
+        with self._lock:
+            if self._closed:
+                return None
+            if not backwards:
+                match = pattern.search(self.data, start)
+                return match.span() if match else None
+            window_end = min(start, self.size)
+            overlap = len(pattern.pattern)
+            while window_end > 0:
+                window_start = max(0, window_end - SEARCH_WINDOW)
+                last = None
+                for match in pattern.finditer(self.data, window_start, window_end):
+                    last = match
+                if last is not None:
+                    return last.span()
+                if window_start == 0:
+                    break
+                window_end = window_start + overlap
+                if window_end >= start:
+                    break
+        return None
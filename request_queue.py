@@ -0,0 +1,116 @@
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from http_client import SendCancelled
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+
+class SendJob:
+    """One request submitted to a RequestExecutor"""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, label, request_id=None):
+        self.id = next(self._ids)
+        self.label = label
+        self.request_id = request_id
+        self.state = QUEUED
+        self.detail = ""  # Progress or result text shown in the queue panel
+        self.submitted_at = time.perf_counter()
+        self.cancel_event = threading.Event()
+        self.future = None
+        self.result = None
+
+    @property
+    def finished(self):
+        return self.state in (DONE, FAILED, CANCELLED)
+
+    def check_cancelled(self):
+        """Raise SendCancelled if cancellation was requested (call between blocking steps)"""
+        if self.cancel_event.is_set():
+            raise SendCancelled()
+
+
+class RequestExecutor:
+    """
+    Runs send functions on a bounded pool of worker threads.
+    func(job) is called on a worker; it should call job.check_cancelled() between steps and may set job.detail.
+    on_change(job) is called (from any thread) whenever a job changes state or detail.
+    """
+
+    def __init__(self, max_workers=4, on_change=None):
+        self._pool = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="send")
+        self.on_change = on_change
+        self.jobs = {}  # job id -> SendJob (unfinished and finished jobs until removed)
+        self._lock = threading.Lock()
+
+    def _notify(self, job):
+        if self.on_change is not None:
+            self.on_change(job)
+
+    def submit(self, func, label, request_id=None):
+        job = SendJob(label, request_id)
+        with self._lock:
+            self.jobs[job.id] = job
+
+        def run():
+            if job.cancel_event.is_set():
+                job.state = CANCELLED
+                self._notify(job)
+                return
+            job.state = RUNNING
+            self._notify(job)
+            try:
+                job.result = func(job)
+                job.state = DONE
+            except SendCancelled:
+                job.state = CANCELLED
+                job.detail = ""
+            except Exception as e:
+                job.state = FAILED
+                job.detail = f"{type(e).__name__}: {e}"
+            self._notify(job)
+
+        self._notify(job)
+        job.future = self._pool.submit(run)
+        return job
+
+    def update(self, job, detail):
+        """Set the progress text of a running job"""
+        job.detail = detail
+        self._notify(job)
+
+    def cancel(self, job_id):
+        """
+        Cancel a job. A queued job is dropped immediately; a running job stops at its next check
+        (between downloaded chunks, or once the response headers arrive).
+        """
+        job = self.jobs.get(job_id)
+        if job is None or job.finished:
+            return
+        job.cancel_event.set()
+        if job.future is not None and job.future.cancel():
+            job.state = CANCELLED
+            self._notify(job)
+        # Otherwise the job is running (or about to start) and stops at its next check
+
+    def remove_finished(self):
+        """Forget finished jobs and return their ids"""
+        with self._lock:
+            finished = [job_id for job_id, job in self.jobs.items() if job.finished]
+            for job_id in finished:
+                del self.jobs[job_id]
+        return finished
+
+    def shutdown(self):
+        """Cancel all jobs and stop the workers without waiting for running requests"""
+        for job_id in list(self.jobs):
+            self.cancel(job_id)
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,240 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+
+SAVE_DELAY = 0.5  # Seconds to wait for further changes before writing (changes in between are coalesced)
+
+
+def load_request_file(path):
+    """
+    Load saved requests, global variables and settings from file.
+    The file structure is:
+    {
+      "requests": [ ... ],
+      "global_variables": { ... },
+      "settings": { ... }
+    }
+    A missing file yields empty collections.
+    """
+    if not os.path.exists(path):
+        return {"requests": [], "global_variables": {}, "settings": {}}
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return {
+        "requests": data.get("requests", []),
+        "global_variables": data.get("global_variables", {}),
+        "settings": data.get("settings", {})
+    }
+
+
+def new_request_id():
+    """Return a new stable id for a saved request"""
+    return uuid.uuid4().hex
+
+
+def ensure_request_ids(saved_requests):
+    """Give every saved request without an "id" a new one. Returns True if any id was added."""
+    added = False
+    for req in saved_requests:
+        if not req.get("id"):
+            req["id"] = new_request_id()
+            added = True
+    return added
+
+
+def save_request_file(path, saved_requests, variable_dict, settings):
+    """
+    Save requests, global variables and settings to file using the structure read by load_request_file.
+    The data is written to a temporary file in the same folder which then replaces the original,
+    so a crash during the write never leaves a truncated file behind.
+    """
+    data = {
+        "requests": saved_requests,
+        "global_variables": variable_dict,
+        "settings": settings
+    }
+    folder = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=folder, prefix="." + os.path.basename(path) + "-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(path):
+            # mkstemp creates the file as private; keep the permissions of the file being replaced
+            os.chmod(temp_path, os.stat(path).st_mode & 0o777)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+class RequestFileWriter:
+    """
+    Write-behind persistence for the saved requests file.
+    schedule() only copies the collections and the request dicts (cheap, on the caller's thread); a background thread
+    serializes and writes the newest snapshot once no change has been scheduled for `delay` seconds, so bursts of
+    changes result in a single write.
+    Call close() before exiting to write any pending changes.
+    """
+
+    def __init__(self, path, delay=SAVE_DELAY):
+        self.path = path
+        self.delay = delay
+        self._pending = None       # (generation, snapshot) waiting to be written
+        self._generation = 0
+        self._scheduled_at = 0.0   # time.monotonic() of the last schedule()
+        self._written_generation = 0
+        self._closed = False
+        self._condition = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def schedule(self, saved_requests, variable_dict, settings):
+        """Queue the current state to be written"""
+        # Request dicts are edited in place by the GUI, so they are copied too
+        snapshot = ([dict(req) for req in saved_requests], dict(variable_dict), dict(settings))
+        with self._condition:
+            self._generation += 1
+            self._scheduled_at = time.monotonic()
+            self._pending = (self._generation, snapshot)
+            self._condition.notify()
+
+    def _take_pending(self):
+        with self._condition:
+            pending, self._pending = self._pending, None
+            return pending
+
+    def _write(self, pending):
+        generation, snapshot = pending
+        with self._write_lock:
+            # A newer snapshot may already have been written by flush()
+            if generation <= self._written_generation:
+                return
+            try:
+                save_request_file(self.path, *snapshot)
+                self._written_generation = generation
+            except Exception as e:
+                print("Error saving requests:", e)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._pending is None and not self._closed:
+                    self._condition.wait()
+                if self._closed:
+                    return
+                # Wait until no change has come in for `delay` seconds so that bursts are coalesced into one write
+                while not self._closed:
+                    remaining = self._scheduled_at + self.delay - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+            pending = self._take_pending()
+            if pending is not None:
+                self._write(pending)
+
+    def flush(self):
+        """Write pending changes now, on the calling thread"""
+        pending = self._take_pending()
+        if pending is not None:
+            self._write(pending)
+
+    def close(self):
+        """Write pending changes and stop the background thread"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
+        self.flush()
+
+
+class RequestIndex:
+    """
+    In-memory search index over the method, description and URL of saved requests.
+    Every whitespace-separated query term must occur (case-insensitively) in one of the fields.
+    Terms of three or more characters are looked up in a trigram index, so a search only inspects
+    requests that contain all trigrams of the term; results keep the order of the saved requests list.
+    """
+
+    def __init__(self):
+        self._text = {}      # request id -> searchable lowercase text
+        self._position = {}  # request id -> sort key (list order)
+        self._trigrams = {}  # trigram -> set of request ids
+        self._next_position = 0
+
+    @staticmethod
+    def _searchable(req):
+        return "\n".join((req.get("method", "GET"), req.get("description", ""), req.get("url", ""))).lower()
+
+    @staticmethod
+    def _trigrams_of(text):
+        return {text[i:i + 3] for i in range(len(text) - 2)}
+
+    def rebuild(self, saved_requests):
+        """Index the whole list (in list order)"""
+        self._text.clear()
+        self._position.clear()
+        self._trigrams.clear()
+        self._next_position = 0
+        for req in saved_requests:
+            self.add(req)
+
+    def add(self, req):
+        """Index a request appended to the end of the list"""
+        self._position[req["id"]] = self._next_position
+        self._next_position += 1
+        self._index_text(req)
+
+    def update(self, req):
+        """Re-index a changed request (its position is kept)"""
+        self._unindex_text(req["id"])
+        self._index_text(req)
+
+    def remove(self, req_id):
+        self._unindex_text(req_id)
+        self._position.pop(req_id, None)
+
+    def _index_text(self, req):
+        text = self._searchable(req)
+        self._text[req["id"]] = text
+        for trigram in self._trigrams_of(text):
+            self._trigrams.setdefault(trigram, set()).add(req["id"])
+
+    def _unindex_text(self, req_id):
+        text = self._text.pop(req_id, None)
+        if text is None:
+            return
+        for trigram in self._trigrams_of(text):
+            ids = self._trigrams.get(trigram)
+            if ids is not None:
+                ids.discard(req_id)
+                if not ids:
+                    del self._trigrams[trigram]
+
+    def search(self, query, limit=None):
+        """Return (ids of matching requests in list order, limited to `limit`; total number of matches)"""
+        terms = query.lower().split()
+        candidates = None
+        for term in terms:
+            if len(term) < 3:
+                continue
+            # Intersect the smallest posting sets first
+            postings = sorted((self._trigrams.get(trigram, set()) for trigram in self._trigrams_of(term)), key=len)
+            for ids in postings:
+                candidates = set(ids) if candidates is None else candidates & ids
+                if not candidates:
+                    return [], 0
+        if candidates is None:
+            candidates = self._text.keys()
+        matches = [req_id for req_id in candidates if all(term in self._text[req_id] for term in terms)]
+        matches.sort(key=self._position.__getitem__)
+        total = len(matches)
+        if limit is not None:
+            matches = matches[:limit]
+        return matches, total
@@ -0,0 +1,215 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from blob_store import BlobStore
+
+# Defaults for the response cache keys of the "settings" section of saved_requests.json
+DEFAULT_CACHE_SETTINGS = {
+    "response_cache_enabled": False,    # Revalidate repeated GETs with If-None-Match/If-Modified-Since (opt-in)
+    "response_cache_max_size_mb": 100   # Drop the least recently used bodies while they take more than this
+}
+
+# Request headers that make a request conditional already; such requests bypass the cache
+CONDITIONAL_HEADERS = ("if-none-match", "if-modified-since", "if-match", "if-unmodified-since", "if-range")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    url TEXT,
+    etag TEXT,
+    last_modified TEXT,
+    status INTEGER,
+    reason TEXT,
+    response_headers TEXT,
+    body_hash TEXT NOT NULL,
+    codec TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    stored_size INTEGER NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_responses_last_used ON responses(last_used);
+CREATE INDEX IF NOT EXISTS idx_responses_body_hash ON responses(body_hash);
+"""
+
+
+def cache_control(headers):
+    """Lowercase directive names of a Cache-Control header (e.g. {"no-store", "max-age"})"""
+    value = headers.get("Cache-Control") or ""
+    return {part.split("=", 1)[0].strip().lower() for part in value.split(",") if part.strip()}
+
+
+def request_cache_key(method, url, headers):
+    """
+    Cache key of a substituted request: method, URL and headers (names case-insensitive).
+    Returns None for requests that are not cached: anything but GET, requests that already carry conditional
+    headers and requests sent with Cache-Control: no-store.
+    """
+    if method.upper() != "GET" or "no-store" in cache_control(headers):
+        return None
+    normalized = sorted((key.lower(), value) for key, value in headers.items())
+    if any(key in CONDITIONAL_HEADERS for key, _ in normalized):
+        return None
+    return hashlib.sha256(json.dumps([method.upper(), url, normalized]).encode("utf-8")).hexdigest()
+
+
+def conditional_headers(entry):
+    """Validator headers to revalidate a cached response"""
+    headers = {}
+    if entry["etag"]:
+        headers["If-None-Match"] = entry["etag"]
+    if entry["last_modified"]:
+        headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+
+class ResponseCache:
+    """
+    Local HTTP cache of GET responses that carry validators (ETag and/or Last-Modified).
+    A cached request is sent with If-None-Match/If-Modified-Since; on 304 Not Modified the body is served from
+    the cache instead of being downloaded again. Bodies are compressed blobs (see BlobStore) taken over from
+    the history store without recompressing; the "responses" table maps request keys to them.
+    The cache is bounded by the compressed size of its bodies; the least recently used entries are evicted first.
+    """
+
+    def __init__(self, folder, max_size_mb=None):
+        self.folder = folder
+        self.max_size_mb = max_size_mb
+        os.makedirs(folder, exist_ok=True)
+        self.blobs = BlobStore(os.path.join(folder, "blobs"))
+        self.blobs.clear_temporary()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(folder, "cache.db"), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+
+    @classmethod
+    def from_settings(cls, folder, settings):
+        merged = dict(DEFAULT_CACHE_SETTINGS)
+        merged.update(settings or {})
+        return cls(folder, max_size_mb=merged["response_cache_max_size_mb"])
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def lookup(self, key):
+        """Return the cached entry of a request key as a dict, or None"""
+        if key is None:
+            return None
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        if not os.path.exists(self.blobs.path(row["body_hash"], row["codec"])):
+            self.forget(key)
+            return None
+        return dict(row)
+
+    def revalidated(self, entry, response_headers):
+        """
+        Mark a cached entry as used after a 304 and return its response headers updated with those of the 304
+        (which may carry a new ETag, Date, Cache-Control, ...). Returns None if the body has been evicted meanwhile.
+        """
+        headers = json.loads(entry["response_headers"] or "{}")
+        lower_names = {name.lower(): name for name in headers}
+        for name, value in response_headers.items():
+            headers.pop(lower_names.get(name.lower(), name), None)
+            headers[name] = value
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE responses SET etag = ?, last_modified = ?, response_headers = ?, last_used = ? WHERE key = ?",
+                (response_headers.get("ETag") or entry["etag"],
+                 response_headers.get("Last-Modified") or entry["last_modified"],
+                 json.dumps(headers), time.time(), entry["key"])
+            )
+        if cursor.rowcount == 0 or not os.path.exists(self.blobs.path(entry["body_hash"], entry["codec"])):
+            return None
+        return headers
+
+    def record(self, key, url, response, source, blob):
+        """
+        Update the cache after a full response to a request key. A 200 response with an ETag or Last-Modified
+        (and without Cache-Control: no-store) is cached, taking its body blob {"hash", "codec", "size"} over from
+        the BlobStore source; any other 200 response removes the key from the cache. Other statuses are ignored.
+        """
+        if key is None or response.status_code != 200:
+            return
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if blob is None or not (etag or last_modified) or "no-store" in cache_control(response.headers):
+            self.forget(key)
+            return
+        with self._lock, self._conn:
+            existing = self._conn.execute(
+                "SELECT stored_size FROM responses WHERE body_hash = ? LIMIT 1", (blob["hash"],)
+            ).fetchone()
+            if existing is not None:
+                stored_size = existing["stored_size"]
+            else:
+                stored_size = self.blobs.commit(self.blobs.import_blob(source, blob["hash"], blob["codec"], blob["size"]), False)
+            previous = self._conn.execute("SELECT body_hash, codec FROM responses WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, url, etag, last_modified, status, reason, response_headers, "
+                "body_hash, codec, size, stored_size, last_used) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, url, etag, last_modified, response.status_code, response.reason,
+                 json.dumps(dict(response.headers)), blob["hash"], blob["codec"], blob["size"], stored_size, time.time())
+            )
+            if previous is not None and previous["body_hash"] != blob["hash"]:
+                self._delete_unreferenced(previous["body_hash"], previous["codec"])
+            self._evict()
+
+    def forget(self, key):
+        """Remove a request key from the cache"""
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT body_hash, codec FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._delete_unreferenced(row["body_hash"], row["codec"])
+
+    def _delete_unreferenced(self, body_hash, codec):
+        """Delete a body blob once no entry refers to it; called with the lock held"""
+        if self._conn.execute("SELECT 1 FROM responses WHERE body_hash = ?", (body_hash,)).fetchone() is None:
+            self.blobs.delete(body_hash, codec)
+
+    def _evict(self):
+        """Drop least recently used entries while bodies exceed max_size_mb; called with the lock held"""
+        if self.max_size_mb is None:
+            return
+        limit = float(self.max_size_mb) * 1024 * 1024
+        blobs = {}  # body hash -> [references, stored size, codec]
+        for row in self._conn.execute("SELECT body_hash, codec, stored_size FROM responses"):
+            blob = blobs.setdefault(row["body_hash"], [0, row["stored_size"], row["codec"]])
+            blob[0] += 1
+        total = sum(blob[1] for blob in blobs.values())
+        if total <= limit:
+            return
+        doomed = []
+        for row in self._conn.execute("SELECT key, body_hash FROM responses ORDER BY last_used"):
+            if total <= limit:
+                break
+            doomed.append((row["key"],))
+            blob = blobs[row["body_hash"]]
+            blob[0] -= 1
+            if blob[0] == 0:
+                total -= blob[1]
+                self.blobs.delete(row["body_hash"], blob[2])
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", doomed)
+
+    def size(self):
+        """Return (number of cached responses, compressed bytes of their bodies)"""
+        with self._lock:
+            count = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            total = self._conn.execute(
+                "SELECT COALESCE(SUM(stored_size), 0) FROM (SELECT DISTINCT body_hash, stored_size FROM responses)"
+            ).fetchone()[0]
+        return count, total
+
+    def read_body(self, entry, limit=None):
+        """Decompressed body text of a cached entry (only about its first limit characters with limit)"""
+        return self.blobs.read_text(entry["body_hash"], entry["codec"], limit)
@@ -0,0 +1,101 @@
+import threading
+from tkinter import messagebox
+
+import customtkinter as ctk
+
+POLL_MS = 200  # How often the live status line is refreshed while a run is in progress
+
+
+class RunDialog(ctk.CTkToplevel):
+    """
+    Window for a long-running job (load test, dataset run): a form of labelled entries, Start/Stop buttons,
+    a live status line and a result box.
+    on_start() reads the form and returns (runner, work), or None to not start (after showing an error):
+    runner must have stop(); work() is called on a background thread and its return value is passed to
+    on_finish(result), which returns (status text, result text) to show. status(runner) gives the live status line.
+    """
+
+    def __init__(self, master, title, geometry, fields, on_start, status, on_finish, font=None, ui_texts=None):
+        super().__init__(master)
+        self.ui_texts = ui_texts or {}
+        self.on_start = on_start
+        self.status = status
+        self.on_finish = on_finish
+        self.runner = None
+        self.title(title)
+        self.geometry(geometry)
+
+        # fields: [(key, label, default)]; callers may add widgets to column 2 of self.form
+        self.form = ctk.CTkFrame(self)
+        self.form.pack(fill="x", padx=5, pady=5)
+        self.fields = {}
+        for row, (key, label, default) in enumerate(fields):
+            ctk.CTkLabel(self.form, text=label).grid(row=row, column=0, sticky="w", padx=5, pady=2)
+            entry = ctk.CTkEntry(self.form)
+            entry.insert(0, default)
+            entry.grid(row=row, column=1, sticky="ew", padx=5, pady=2)
+            self.fields[key] = entry
+        self.form.grid_columnconfigure(1, weight=1)
+
+        button_frame = ctk.CTkFrame(self)
+        button_frame.pack(fill="x", padx=5, pady=5)
+        self.start_button = ctk.CTkButton(button_frame, text=self.ui_texts.get("load_test_start_button", "Start"),
+                                          command=self.start)
+        self.start_button.pack(side="left", padx=5)
+        ctk.CTkButton(button_frame, text=self.ui_texts.get("load_test_stop_button", "Stop"),
+                      command=self.stop).pack(side="left", padx=5)
+        self.status_label = ctk.CTkLabel(self, text="")
+        self.status_label.pack(anchor="w", padx=5)
+        self.result_box = ctk.CTkTextbox(self, font=font)
+        self.result_box.pack(fill="both", expand=True, padx=5, pady=5)
+        self.protocol("WM_DELETE_WINDOW", self.close)
+
+    def value(self, key):
+        """Stripped text of a form entry"""
+        return self.fields[key].get().strip()
+
+    def set_value(self, key, text):
+        self.fields[key].delete(0, "end")
+        self.fields[key].insert(0, text)
+
+    def show_error(self, message):
+        messagebox.showerror("Error", message, parent=self)
+
+    def start(self):
+        started = self.on_start()
+        if started is None:
+            return
+        self.runner, work = started
+        self.start_button.configure(state="disabled")
+        self.result_box.delete("1.0", "end")
+
+        def run():
+            result = work()
+            self.master.after(0, lambda: self.finish(result))  # The dialog may be closed by then
+
+        threading.Thread(target=run, daemon=True).start()
+        self.poll()
+
+    def poll(self):
+        if self.runner is None or not self.winfo_exists():
+            return
+        self.status_label.configure(text=self.status(self.runner))
+        self.after(POLL_MS, self.poll)
+
+    def finish(self, result):
+        self.runner = None
+        if not self.winfo_exists():
+            return
+        self.start_button.configure(state="normal")
+        status_text, result_text = self.on_finish(result)
+        self.status_label.configure(text=status_text)
+        self.result_box.delete("1.0", "end")
+        self.result_box.insert("1.0", result_text)
+
+    def stop(self):
+        if self.runner is not None:
+            self.runner.stop()
+
+    def close(self):
+        self.stop()
+        self.destroy()
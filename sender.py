@@ -0,0 +1,168 @@
+import time
+from datetime import datetime
+
+from extractors import ExtractionError, run_extractors
+from http_client import (FileBody, PREVIEW_CHARS, STREAM_MEMORY_LIMIT, SendCancelled, describe_connection,
+                         download_body, format_bytes, phase_timings)
+from json_format import format_preview
+from response_cache import conditional_headers, request_cache_key
+
+# Texts added to the response info line; the GUI passes its ui_lang.json texts instead
+DEFAULT_TEXTS = {
+    "cache_served": "Served from cache (revalidated)",
+    "body_unchanged": "Body unchanged since previous run",
+    "extracted_label": "Extracted: "
+}
+
+
+class RequestSender:
+    """
+    The send pipeline behind the Send button, without any GUI: send one prepared request (see
+    http_client.prepare_send), stream the body into memory or the history store, revalidate against the
+    response cache, build the preview text, record the history entry and run the request's extractors.
+    It can be used from any thread; scripts and headless workers use it directly.
+    """
+
+    def __init__(self, session_pool, history_store, response_cache=None, texts=None):
+        self.session_pool = session_pool
+        self.history_store = history_store
+        self.response_cache = response_cache
+        self.texts = dict(DEFAULT_TEXTS)
+        self.texts.update(texts or {})
+
+    def send(self, method, description, prepared, request_key=None, timeout=None, extractors=(), variable_dict=None,
+             use_cache=False, cancel_event=None, on_progress=None, request_time=None):
+        """
+        Send a prepared request and record it in the history store. Returns a dict:
+          entry_id: history entry, status: HTTP status or None, bytes: body size,
+          info: response info line, display: preview text (pretty-printed JSON),
+          complete: False if display is only the beginning of the body, timings: phase_timings() or None,
+          extracted: {variable: value}, from_cache: True if a 304 was answered from the cache,
+          detail: short status for progress displays, error: "Type: message" or None,
+          stages: seconds spent in "send", "download", "format" and "history".
+        Errors are recorded in the history entry and returned in the result, except SendCancelled, which is raised
+        (after recording the cancellation) if cancel_event is set during the send.
+        """
+        from requests.exceptions import RequestException  # Loaded with the first session; see SessionPool
+        from requests.structures import CaseInsensitiveDict
+
+        send_kwargs = prepared["send_kwargs"]
+        if isinstance(send_kwargs.get("data"), FileBody):
+            send_kwargs["data"].cancel_event = cancel_event
+        stage_start = time.perf_counter()
+        entry_id = self.history_store.start_entry(request_time or datetime.now(), request_key, method, description,
+                                                  prepared["url"], prepared["headers_text"], prepared["body_text"])
+        stages = {"history": time.perf_counter() - stage_start}
+        result = {"entry_id": entry_id, "status": None, "bytes": 0, "timings": None, "extracted": {}, "from_cache": False,
+                  "error": None, "stages": stages}
+        cache_key = None
+        cached = None
+        if use_cache and self.response_cache is not None:
+            cache_key = request_cache_key(method, prepared["url"], prepared["headers"])
+            cached = self.response_cache.lookup(cache_key)
+        headers = prepared["headers"]
+        # A cached response is revalidated; on 304 Not Modified its body is served from the cache
+        send_headers = dict(headers, **conditional_headers(cached)) if cached is not None else headers
+        spilled = False
+        finished = False
+        try:
+            start_time = time.perf_counter()
+            response = self.session_pool.request(method, prepared["url"], headers=send_headers, stream=True,
+                                                 timeout=timeout, **send_kwargs)
+            headers_received = time.perf_counter()
+            stages["send"] = headers_received - start_time
+            if cancel_event is not None and cancel_event.is_set():
+                response.close()
+                raise SendCancelled()
+
+            status_message = f"{response.status_code}"
+            if response.reason:
+                status_message += f" {response.reason}"
+
+            # Bodies too large to keep in memory are written straight into the history store
+            download = download_body(response, lambda: self.history_store.open_body_file(entry_id),
+                                     on_progress=on_progress, cancel_event=cancel_event)
+            timings = phase_timings(response, start_time, headers_received, time.perf_counter(), download["bytes"])
+            if download["spill_file"] is not None:
+                spilled = True
+                download["spill_file"].close()
+            stages["download"] = time.perf_counter() - headers_received
+
+            response_headers = response.headers
+            cache_headers = None
+            if cached is not None and response.status_code == 304:
+                cache_headers = self.response_cache.revalidated(cached, response.headers)
+            if cache_headers is not None:
+                # The history entry shares the cached blob, so the body is neither downloaded nor compressed again
+                response_headers = CaseInsensitiveDict(cache_headers)
+                self.history_store.attach_body(entry_id, self.history_store.blobs.import_blob(
+                    self.response_cache.blobs, cached["body_hash"], cached["codec"], cached["size"]))
+                spilled = cached["size"] > STREAM_MEMORY_LIMIT
+                body = self.response_cache.read_body(cached, PREVIEW_CHARS if spilled else None)
+                download = {"text": None if spilled else body, "preview": body[:PREVIEW_CHARS], "bytes": cached["size"]}
+            info_text = (f"Status: {status_message} | Time: {timings['total']:.2f} sec | Size: {format_bytes(download['bytes'])} | "
+                         f"{describe_connection(response)}")
+            if cache_headers is not None:
+                info_text += " | " + self.texts["cache_served"]
+
+            # Only the displayed part is pretty-printed; the history keeps the body as received
+            stage_start = time.perf_counter()
+            response_display, complete = format_preview(
+                download["preview"] if spilled else download["text"], PREVIEW_CHARS,
+                content_type=response_headers.get("Content-Type"), truncated=spilled
+            )
+            stages["format"] = time.perf_counter() - stage_start
+            stage_start = time.perf_counter()
+            stored = self.history_store.finish_entry(
+                entry_id, datetime.now(), status=response.status_code, reason=response.reason, info=info_text,
+                response_headers=response_headers,
+                body_text=None if spilled or cache_headers is not None else download["text"], timings=timings
+            )
+            finished = True
+            if cache_headers is None and stored["body_hash"] is not None and self.response_cache is not None:
+                self.response_cache.record(cache_key, prepared["url"], response, self.history_store.blobs,
+                                           self.history_store.blob_info(stored["body_hash"]))
+            stages["history"] += time.perf_counter() - stage_start
+            if stored["unchanged"]:
+                info_text += " | " + self.texts["body_unchanged"]
+            if extractors and response.status_code < 400:
+                try:
+                    if spilled and any(extractor["source"] != "header" for extractor in extractors):
+                        raise ExtractionError("Response body too large to extract from")
+                    result["extracted"] = run_extractors(extractors, download["text"] or "", response_headers,
+                                                         variable_dict or {})
+                    info_text += " | " + self.texts["extracted_label"] + ", ".join(result["extracted"])
+                except ExtractionError as e:
+                    info_text += f" | {e}"
+            result.update(status=response.status_code, bytes=download["bytes"], timings=timings,
+                          from_cache=cache_headers is not None,
+                          detail=status_message + (" (cached)" if cache_headers is not None else ""))
+        except SendCancelled:
+            self.history_store.finish_entry(entry_id, datetime.now(), info="Response: Cancelled", error="Cancelled")
+            raise
+        except RequestException as e:
+            status_message = ""
+            if hasattr(e, 'response') and e.response is not None:
+                status_message = f"{e.response.status_code}"
+                if e.response.reason:
+                    status_message += f" {e.response.reason}"
+            info_text = "Response: Error"
+            response_display = f"An error occurred\n{type(e).__name__}: {e}"
+            if status_message:
+                response_display += f"\nStatus: {status_message}"
+            complete = True
+            result["error"] = f"{type(e).__name__}: {e}"
+            self.history_store.finish_entry(entry_id, datetime.now(), info=info_text, error=result["error"])
+            result["detail"] = type(e).__name__
+        except Exception as e:
+            # Anything else (writing the spilled body, an evicted cache blob, ...) still closes the history entry;
+            # a response that has already been recorded is kept
+            info_text = "Response: Error"
+            response_display = f"An error occurred\n{type(e).__name__}: {e}"
+            complete = True
+            result["error"] = f"{type(e).__name__}: {e}"
+            if not finished:
+                self.history_store.finish_entry(entry_id, datetime.now(), info=info_text, error=result["error"])
+            result["detail"] = type(e).__name__
+        result.update(info=info_text, display=response_display, complete=complete)
+        return result
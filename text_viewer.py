@@ -0,0 +1,353 @@
+import json
+import threading
+from tkinter import ttk
+
+import customtkinter as ctk
+
+from http_client import format_bytes
+from json_format import decode_value, scan_children, value_span
+
+INDEX_POLL_MS = 200      # How often the viewer refreshes while the line index is still being built
+SEARCH_DELAY_MS = 250    # Delay after the last keystroke before the incremental search runs
+MAX_RENDERED_LINES = 300  # Upper bound of lines put into the text widget at once
+TREE_VALUE_CHARS = 200    # Leaf values are cut to this length in the JSON tree
+
+
+class PagedTextViewer(ctk.CTkToplevel):
+    """
+    Window showing a MappedText page by page: only the lines that fit into the window are decoded
+    and inserted into the text widget, so opening and scrolling cost the same for 1 KB and 1 GB.
+    Offers jumping to a byte offset and incremental (type-ahead) search with next/previous.
+    header_text (e.g. request and response metadata) is shown above the body in a normal textbox.
+    """
+
+    def __init__(self, master, mapped, header_text="", title="", font=None, ui_texts=None):
+        super().__init__(master)
+        self.mapped = mapped
+        self.ui_texts = ui_texts or {}
+        self.title(title)
+        self.geometry("900x650")
+        self.protocol("WM_DELETE_WINDOW", self.close)
+
+        self.top_line = 0
+        self.visible_lines = 1
+        self.match = None  # (start, end) byte offsets of the highlighted search match
+        self.search_origin = 0  # Offset the type-ahead search starts from
+        self.search_generation = 0  # Only the result of the latest search is applied
+        self.search_after_id = None
+        self.poll_after_id = None
+
+        if header_text:
+            header_box = ctk.CTkTextbox(self, height=140, font=font)
+            header_box.pack(fill="x", padx=5, pady=(5, 0))
+            header_box.insert("1.0", header_text)
+            header_box.configure(state="disabled")
+
+        toolbar = ctk.CTkFrame(self)
+        toolbar.pack(fill="x", padx=5, pady=5)
+        self.search_entry = ctk.CTkEntry(toolbar, width=260, placeholder_text=self.ui_texts.get("viewer_search_placeholder", "Search"))
+        self.search_entry.pack(side="left", padx=(5, 2))
+        self.search_entry.bind("<KeyRelease>", self.on_search_changed)
+        self.search_entry.bind("<Return>", lambda event: self.find(backwards=False))
+        self.search_entry.bind("<Shift-Return>", lambda event: self.find(backwards=True))
+        self.match_case_var = ctk.BooleanVar(value=False)
+        ctk.CTkCheckBox(toolbar, text=self.ui_texts.get("viewer_match_case", "Match case"), variable=self.match_case_var,
+                        command=self.restart_search).pack(side="left", padx=2)
+        ctk.CTkButton(toolbar, text=self.ui_texts.get("viewer_previous_button", "Previous"), width=80,
+                      command=lambda: self.find(backwards=True)).pack(side="left", padx=2)
+        ctk.CTkButton(toolbar, text=self.ui_texts.get("viewer_next_button", "Next"), width=80,
+                      command=lambda: self.find(backwards=False)).pack(side="left", padx=2)
+        self.offset_entry = ctk.CTkEntry(toolbar, width=120, placeholder_text=self.ui_texts.get("viewer_offset_placeholder", "Byte offset"))
+        self.offset_entry.pack(side="left", padx=(10, 2))
+        self.offset_entry.bind("<Return>", lambda event: self.go_to_offset())
+        ctk.CTkButton(toolbar, text=self.ui_texts.get("viewer_go_button", "Go"), width=50,
+                      command=self.go_to_offset).pack(side="left", padx=2)
+        if mapped.text(0, 1024).lstrip()[:1] in ("{", "["):
+            ctk.CTkButton(toolbar, text=self.ui_texts.get("viewer_json_tree_button", "JSON Tree"), width=90,
+                          command=self.open_json_tree).pack(side="left", padx=(10, 2))
+
+        self.status_label = ctk.CTkLabel(self, text="")
+        self.status_label.pack(side="bottom", anchor="w", padx=5)
+
+        body_frame = ctk.CTkFrame(self)
+        body_frame.pack(fill="both", expand=True, padx=5, pady=(0, 5))
+        self.scrollbar = ctk.CTkScrollbar(body_frame, command=self.on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y")
+        self.text_box = ctk.CTkTextbox(body_frame, font=font, wrap="none", activate_scrollbars=False)
+        self.text_box.pack(side="left", fill="both", expand=True)
+        self.text_box.tag_config("match", background="#f2c744", foreground="black")
+        self.text_box.bind("<Configure>", lambda event: self.render())
+        self.text_box.bind("<MouseWheel>", self.on_mouse_wheel)
+        self.text_box.bind("<Button-4>", lambda event: self.scroll_lines(-3))
+        self.text_box.bind("<Button-5>", lambda event: self.scroll_lines(3))
+        for key, action in (("<Up>", lambda: self.scroll_lines(-1)), ("<Down>", lambda: self.scroll_lines(1)),
+                            ("<Prior>", lambda: self.scroll_lines(-self.visible_lines)),
+                            ("<Next>", lambda: self.scroll_lines(self.visible_lines)),
+                            ("<Control-Home>", lambda: self.scroll_to_line(0)),
+                            ("<Control-End>", lambda: self.scroll_to_line(self.mapped.line_count))):
+            self.text_box.bind(key, lambda event, action=action: action() or "break")
+
+        if not mapped.indexed:
+            mapped.build_index_async()
+            self.poll_after_id = self.after(INDEX_POLL_MS, self.poll_index)
+        self.after(50, self.render)
+
+    def close(self):
+        self.search_generation += 1
+        for after_id in (self.search_after_id, self.poll_after_id):
+            if after_id is not None:
+                self.after_cancel(after_id)
+        # Closing waits for a running search to release the mapping, so do not block the UI on it
+        threading.Thread(target=self.mapped.close, daemon=True).start()
+        self.destroy()
+
+    def open_json_tree(self):
+        JsonTreeViewer(self, self.mapped.reopen(), title=self.title(), ui_texts=self.ui_texts)
+
+    def poll_index(self):
+        """Refresh the scrollbar and status while the line index is being built"""
+        self.poll_after_id = None
+        self.render()
+        if not self.mapped.indexed:
+            self.poll_after_id = self.after(INDEX_POLL_MS, self.poll_index)
+
+    def render(self):
+        """Decode and show the lines that fit into the text widget, starting at top_line"""
+        if not self.winfo_exists():
+            return
+        line_count = self.mapped.line_count
+        self.top_line = max(0, min(self.top_line, line_count - 1))
+        # Render a generous number of lines; how many are fully visible is read back from the widget
+        rows = max(1, min(MAX_RENDERED_LINES, self.text_box.winfo_height() // 10 + 1))
+        self.text_box.configure(state="normal")
+        self.text_box.delete("1.0", "end")
+        self.text_box.insert("1.0", self.mapped.lines(self.top_line, rows))
+        last_visible = int(self.text_box.index(f"@0,{self.text_box.winfo_height()}").split(".")[0])
+        self.visible_lines = max(1, last_visible - 1)
+        if self.match is not None:
+            self.highlight_match(rows)
+        self.text_box.configure(state="disabled")
+
+        if line_count:
+            self.scrollbar.set(self.top_line / line_count, min(1.0, (self.top_line + self.visible_lines) / line_count))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+        self.update_status()
+
+    def highlight_match(self, rows):
+        window_start = self.mapped.line_offset(self.top_line)
+        window_end = self.mapped.line_offset(min(self.top_line + rows, self.mapped.line_count))
+        start, end = self.match
+        if start < window_start or start >= window_end:
+            return
+        # Convert byte offsets to character positions within the rendered text
+        first = len(self.mapped.text(window_start, start))
+        length = len(self.mapped.text(start, min(end, window_end)))
+        self.text_box.tag_add("match", f"1.0 + {first} chars", f"1.0 + {first + length} chars")
+
+    def update_status(self, message=""):
+        mapped = self.mapped
+        line_count = mapped.line_count
+        if line_count:
+            position = (f"Line {self.top_line + 1:,} / {line_count:,}"
+                        + ("" if mapped.indexed else "+")
+                        + f" | Offset {mapped.line_offset(self.top_line):,} / {mapped.size:,} ({format_bytes(mapped.size)})")
+        else:
+            position = format_bytes(mapped.size)
+        if not mapped.indexed:
+            position += " | " + self.ui_texts.get("viewer_indexing", "Indexing lines...")
+        self.status_label.configure(text=position + (f" | {message}" if message else ""))
+
+    def scroll_to_line(self, line):
+        self.top_line = line
+        self.render()
+
+    def scroll_lines(self, delta):
+        self.scroll_to_line(self.top_line + delta)
+
+    def on_mouse_wheel(self, event):
+        # Windows reports multiples of 120 per notch, macOS small values
+        step = event.delta // 120 if abs(event.delta) >= 120 else event.delta
+        self.scroll_lines(-3 * step)
+        return "break"
+
+    def on_scrollbar(self, *args):
+        if args[0] == "moveto":
+            self.scroll_to_line(int(float(args[1]) * self.mapped.line_count))
+        elif args[0] == "scroll":
+            amount = int(args[1])
+            self.scroll_lines(amount * self.visible_lines if args[2] == "pages" else amount)
+
+    def show_offset(self, offset):
+        """Scroll so that the line containing a byte offset is visible (indexing up to it if needed)"""
+        self.mapped.ensure_indexed(offset)
+        line = self.mapped.line_at_offset(offset)
+        if not self.top_line <= line < self.top_line + self.visible_lines:
+            # Keep a few lines of context above the target
+            self.top_line = max(0, line - 3)
+        self.render()
+
+    def go_to_offset(self):
+        text = self.offset_entry.get().strip().replace(",", "")
+        try:
+            offset = int(text, 0)
+        except ValueError:
+            self.update_status(self.ui_texts.get("viewer_offset_error", "Offset must be a number"))
+            return
+        self.match = None
+        self.show_offset(max(0, min(offset, max(0, self.mapped.size - 1))))
+
+    def on_search_changed(self, event):
+        """Type-ahead search: re-run the search from the same origin shortly after the text changes"""
+        if event.keysym in ("Return", "Shift_L", "Shift_R"):
+            return
+        if self.search_after_id is not None:
+            self.after_cancel(self.search_after_id)
+        self.search_after_id = self.after(SEARCH_DELAY_MS, self.restart_search)
+
+    def restart_search(self):
+        self.search_after_id = None
+        if self.match is None:
+            self.search_origin = self.mapped.line_offset(self.top_line) if self.mapped.line_count else 0
+        self.run_search(self.search_origin, backwards=False)
+
+    def find(self, backwards):
+        """Jump to the next (or previous) match after (before) the current one"""
+        if self.match is not None:
+            start = self.match[0] if backwards else self.match[0] + 1
+        else:
+            start = self.mapped.line_offset(self.top_line) if self.mapped.line_count else 0
+        self.run_search(start, backwards)
+        return "break"
+
+    def run_search(self, start, backwards):
+        """Search on a background thread (wrapping around once) and show the match when found"""
+        text = self.search_entry.get()
+        self.search_generation += 1
+        generation = self.search_generation
+        if not text:
+            self.match = None
+            self.render()
+            return
+        pattern = self.mapped.compile_search(text, self.match_case_var.get())
+        self.update_status(self.ui_texts.get("viewer_searching", "Searching..."))
+
+        def search():
+            found = self.mapped.search(pattern, start, backwards)
+            wrapped = False
+            if found is None:
+                found = self.mapped.search(pattern, self.mapped.size if backwards else 0, backwards)
+                wrapped = found is not None
+            self.after(0, lambda: self.show_search_result(generation, found, wrapped))
+
+        threading.Thread(target=search, daemon=True).start()
+
+    def show_search_result(self, generation, found, wrapped):
+        if generation != self.search_generation or not self.winfo_exists():
+            return
+        self.match = found
+        if found is None:
+            self.render()
+            self.update_status(self.ui_texts.get("viewer_not_found", "Not found"))
+            return
+        self.search_origin = found[0]
+        self.show_offset(found[0])
+        if wrapped:
+            self.update_status(self.ui_texts.get("viewer_wrapped", "Search wrapped around"))
+
+
+class JsonTreeViewer(ctk.CTkToplevel):
+    """
+    Window showing a JSON body as a tree that is built lazily: opening a node scans only that node's bytes
+    (on a background thread) to list its children, at most CHILDREN_PER_BATCH at a time, and leaf values are
+    decoded only when their parent is opened. Nothing is parsed up front, so the size of the body does not matter.
+    """
+
+    def __init__(self, master, mapped, title="", ui_texts=None):
+        super().__init__(master)
+        self.mapped = mapped
+        self.ui_texts = ui_texts or {}
+        self.title(title)
+        self.geometry("800x600")
+        self.protocol("WM_DELETE_WINDOW", self.close)
+        self.nodes = {}  # Tree item id -> [start, end, resume offset or None, children listed so far]; None once loaded
+
+        self.tree = ttk.Treeview(self, columns=("value", "size"), selectmode="browse")
+        self.tree.heading("#0", text=self.ui_texts.get("json_tree_column_key", "Key"))
+        self.tree.heading("value", text=self.ui_texts.get("json_tree_column_value", "Value"))
+        self.tree.heading("size", text=self.ui_texts.get("json_tree_column_size", "Size"))
+        self.tree.column("#0", width=220)
+        self.tree.column("value", width=440)
+        self.tree.column("size", width=80, anchor="e")
+        scrollbar = ctk.CTkScrollbar(self, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side="right", fill="y")
+        self.tree.pack(fill="both", expand=True, padx=5, pady=5)
+        self.tree.bind("<<TreeviewOpen>>", self.on_open)
+        self.tree.bind("<Double-1>", self.on_double_click)
+
+        start, end = mapped.run_locked(value_span)
+        self.add_node("", "$", start, end)
+
+    def close(self):
+        threading.Thread(target=self.mapped.close, daemon=True).start()
+        self.destroy()
+
+    def add_node(self, parent, label, start, end):
+        """Insert one value; containers get a placeholder child so they can be opened"""
+        kind = self.mapped.run_locked(lambda data: bytes(data[start:start + 1]))
+        if kind in (b"{", b"["):
+            summary = "{...}" if kind == b"{" else "[...]"
+            item = self.tree.insert(parent, "end", text=label, values=(summary, format_bytes(end - start)))
+            self.tree.insert(item, "end", text=self.ui_texts.get("json_tree_loading", "Loading..."))
+            self.nodes[item] = [start, end, None, 0]
+            return item
+        value = self.mapped.run_locked(decode_value, start, end)
+        text = value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+        if len(text) > TREE_VALUE_CHARS:
+            text = text[:TREE_VALUE_CHARS] + "..."
+        return self.tree.insert(parent, "end", text=label, values=(text.replace("\n", " "), format_bytes(end - start)))
+
+    def on_open(self, event):
+        item = self.tree.focus()
+        node = self.nodes.get(item)
+        if node is not None and node[3] == 0:
+            self.load_children(item)
+
+    def on_double_click(self, event):
+        """Double-clicking the "more" row of a node lists its next batch of children"""
+        item = self.tree.identify_row(event.y)
+        if item and self.tree.tag_has("more", item):
+            parent = self.tree.parent(item)
+            self.tree.delete(item)
+            self.load_children(parent)
+
+    def load_children(self, item):
+        """Scan the node's next batch of children on a background thread, then insert them"""
+        start, end, resume, listed = self.nodes[item]
+        self.nodes[item] = None  # Ignore further opens while loading
+
+        def scan():
+            result = self.mapped.run_locked(scan_children, start, end, resume)
+            if result is not None:
+                self.after(0, lambda: self.show_children(item, start, end, listed, *result))
+
+        threading.Thread(target=scan, daemon=True).start()
+
+    def show_children(self, item, start, end, listed, children, resume):
+        if not self.winfo_exists():
+            return
+        if listed == 0:
+            self.tree.delete(*self.tree.get_children(item))  # Remove the placeholder
+        for number, (key_span, child_start, child_end) in enumerate(children, listed):
+            if key_span is None:
+                label = f"[{number}]"
+            else:
+                label = str(self.mapped.run_locked(decode_value, *key_span))
+            self.add_node(item, label, child_start, child_end)
+        listed += len(children)
+        if resume is not None:
+            # More children than one batch: list the next batch on demand
+            self.tree.insert(item, "end", text=self.ui_texts.get("json_tree_more", "... (double-click to show more)"),
+                             values=(f"{listed:,}+", ""), tags=("more",))
+            self.nodes[item] = [start, end, resume, listed]
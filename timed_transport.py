@@ -0,0 +1,92 @@
+import socket
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+from urllib3.util.connection import allowed_gai_family
+from urllib3.util.retry import Retry
+
+
+class TimedConnectionMixin:
+    """
+    Records how long name resolution and the TCP connect take when a connection is (re)established.
+    The name is resolved here and the resolved addresses are tried in order, like urllib3 does, so both phases
+    can be timed separately; an address that refuses or times out moves on to the next one.
+    setup_timings is set to {"dns": s, "connect": s, "tls": s} for each new socket; "connect" includes the
+    time spent on addresses that failed.
+    """
+
+    setup_timings = None
+
+    def _new_conn(self):
+        start = time.perf_counter()
+        host = self._dns_host.strip("[]")
+        try:
+            addresses = socket.getaddrinfo(host, self.port, allowed_gai_family(), socket.SOCK_STREAM)
+        except (socket.gaierror, UnicodeError):
+            addresses = []  # Let urllib3 raise its usual NameResolutionError/LocationParseError
+        resolved = time.perf_counter()
+        if not addresses:
+            sock = super()._new_conn()
+        else:
+            dns_host = self._dns_host
+            try:
+                for index, address in enumerate(addresses):
+                    # TLS still verifies against self.host, only the socket connects to the resolved address
+                    self._dns_host = address[4][0]
+                    try:
+                        sock = super()._new_conn()
+                        break
+                    except (NewConnectionError, ConnectTimeoutError):
+                        if index == len(addresses) - 1:
+                            raise
+            finally:
+                self._dns_host = dns_host
+        self.setup_timings = {"dns": resolved - start, "connect": time.perf_counter() - resolved, "tls": 0.0}
+        return sock
+
+
+class TimedHTTPConnection(TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class TimedHTTPSConnection(TimedConnectionMixin, HTTPSConnection):
+    def connect(self):
+        start = time.perf_counter()
+        super().connect()
+        total = time.perf_counter() - start
+        if self.setup_timings is not None:
+            # Whatever connect() spent beyond resolving and connecting is the TLS handshake
+            self.setup_timings["tls"] = max(0.0, total - self.setup_timings["dns"] - self.setup_timings["connect"])
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter whose direct (non-proxy) connections record DNS/connect/TLS timings"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {"http": TimedHTTPConnectionPool, "https": TimedHTTPSConnectionPool}
+
+
+def new_session(pool_size, max_retries=0, backoff_factor=0.5):
+    """
+    Return a requests.Session whose HTTP and HTTPS connections record setup timings, keeping up to pool_size
+    connections per host and retrying failed connections max_retries times (idempotent methods only).
+    """
+    session = requests.Session()
+    retry = Retry(total=max_retries, backoff_factor=backoff_factor, raise_on_status=False)
+    adapter = TimedHTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
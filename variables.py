@@ -0,0 +1,208 @@
+import os
+import re
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+VARIABLE_PATTERN = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+FILE_VALUE_PATTERN = re.compile(r"\[.+\]")
+
+FILE_CACHE_MAX_BYTES = 64 * 1024 * 1024  # Total size of file variable contents kept in memory
+
+
+class UndefinedVariableError(ValueError):
+    """Raised when a {{variable}} is not defined. args[0] is the variable name."""
+
+
+class Template:
+    """
+    A text with {{variable}} placeholders, parsed once.
+    parts alternates literal text and variable names: [literal, name, literal, name, ..., literal].
+    """
+
+    __slots__ = ("text", "parts", "variables")
+
+    def __init__(self, text):
+        self.text = text
+        self.parts = VARIABLE_PATTERN.split(text)
+        # Referenced variable names in order of first use
+        self.variables = tuple(dict.fromkeys(self.parts[1::2]))
+
+    @property
+    def placeholders(self):
+        """(start, end, name) of every placeholder in the text; computed on demand, rendering only needs parts"""
+        return [(m.start(), m.end(), m.group(1)) for m in VARIABLE_PATTERN.finditer(self.text)]
+
+    @property
+    def single_variable(self):
+        """The variable name if the whole text is exactly one placeholder, otherwise None"""
+        if len(self.parts) == 3 and not self.parts[0] and not self.parts[2]:
+            return self.parts[1]
+        return None
+
+    def render(self, values):
+        """Fill in the placeholders from a dict of already resolved variable values"""
+        if len(self.parts) == 1:
+            return self.text
+        out = list(self.parts)
+        for i in range(1, len(out), 2):
+            out[i] = values[out[i]]
+        return "".join(out)
+
+
+@lru_cache(maxsize=4096)
+def compile_template(text):
+    """Return the (cached) Template for a text"""
+    return Template(text)
+
+
+class CompiledRequest:
+    """Templates of the URL, headers and body of a saved request, plus the set of variables they reference"""
+
+    def __init__(self, url, headers, body):
+        self.url = compile_template(url)
+        self.headers = compile_template(headers)
+        self.body = compile_template(body)
+        self.variables = tuple(dict.fromkeys(self.url.variables + self.headers.variables + self.body.variables))
+
+    def undefined(self, variable_dict):
+        """Names of referenced variables that are not defined in variable_dict"""
+        return [name for name in self.variables if name not in variable_dict]
+
+    def render(self, variable_dict, variables_folder="variables", on_file_error=None, skip_body=False):
+        """
+        Return (url, headers_text, body_text) with all variables substituted. Each variable is resolved once.
+        With skip_body the body is not rendered ("" is returned), so a file-backed body is never read into memory.
+        """
+        if skip_body:
+            names = tuple(dict.fromkeys(self.url.variables + self.headers.variables))
+        else:
+            names = self.variables
+        values = resolve_variables(names, variable_dict, variables_folder, on_file_error)
+        body = "" if skip_body else self.body.render(values)
+        return self.url.render(values), self.headers.render(values), body
+
+    def body_file(self, variable_dict, variables_folder="variables"):
+        """
+        Path of the file to upload if the whole body is a single file variable ({{name}} with value [filename])
+        and the file exists, otherwise None. Such bodies can be streamed from disk instead of being rendered as text.
+        """
+        var_name = self.body.single_variable
+        if var_name is None or var_name not in variable_dict:
+            return None
+        filename = file_variable_name(variable_dict[var_name])
+        if filename is None:
+            return None
+        filepath = os.path.join(variables_folder, filename)
+        return filepath if os.path.isfile(filepath) else None
+
+
+@lru_cache(maxsize=4096)
+def _compile_request(url, headers, body):
+    return CompiledRequest(url, headers, body)
+
+
+def compile_request(req):
+    """Return the (cached) CompiledRequest for a saved request dict"""
+    return _compile_request(req.get("url", ""), req.get("headers", ""), req.get("body", ""))
+
+
+class FileVariableCache:
+    """
+    Size-bounded LRU cache of file variable contents.
+    Entries are validated against the file's mtime and size on every lookup, so edited files are re-read.
+    """
+
+    def __init__(self, max_bytes=FILE_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # path -> ((mtime_ns, size), content)
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, path):
+        """Return the text content of the file (raises OSError if it cannot be read)"""
+        stat = os.stat(path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == signature:
+                self._entries.move_to_end(path)
+                return entry[1]
+        with open(path, "r", encoding="utf-8") as f:
+            content = f.read()
+        with self._lock:
+            old = self._entries.pop(path, None)
+            if old is not None:
+                self._size -= old[0][1]
+            # Files larger than the whole cache are returned but not kept
+            if stat.st_size <= self.max_bytes:
+                self._entries[path] = (signature, content)
+                self._size += stat.st_size
+                while self._size > self.max_bytes:
+                    _, (evicted_signature, _) = self._entries.popitem(last=False)
+                    self._size -= evicted_signature[1]
+        return content
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+file_cache = FileVariableCache()
+
+
+def file_variable_name(var_value):
+    """Return the file name if a variable value has the [filename] format, otherwise None"""
+    if isinstance(var_value, str) and FILE_VALUE_PATTERN.fullmatch(var_value):
+        return var_value.strip("[]")
+    return None
+
+
+def resolve_variables(names, variable_dict, variables_folder="variables", on_file_error=None):
+    """
+    Return {name: value} for the given variable names.
+    If a variable value is in the format [filename], the content of the corresponding file in the variables folder
+    is used (through the file cache). on_file_error(filename, exception) is called when such a file exists but
+    cannot be read; the original value is used in that case and when the file does not exist.
+    """
+    values = {}
+    for var_name in names:
+        if var_name not in variable_dict:
+            raise UndefinedVariableError(var_name)
+        var_value = variable_dict[var_name]
+        filename = file_variable_name(var_value)
+        if filename is None:
+            values[var_name] = str(var_value)
+            continue
+        filepath = os.path.join(variables_folder, filename)
+        try:
+            values[var_name] = file_cache.get(filepath)
+        except FileNotFoundError:
+            # If file is not found, use the original value
+            values[var_name] = var_value
+        except Exception as e:
+            if on_file_error is not None:
+                on_file_error(filename, e)
+            values[var_name] = var_value
+    return values
+
+
+def substitute_variables(text, variable_dict, variables_folder="variables", on_file_error=None):
+    """
+    Replace all occurrences of {{variable}} in the text with the value from variable_dict.
+    If a variable value is in the format [filename], load the content from the corresponding file in the variables folder.
+    on_file_error(filename, exception) is called when such a file exists but cannot be read.
+    """
+    template = compile_template(text)
+    return template.render(resolve_variables(template.variables, variable_dict, variables_folder, on_file_error))
+
+
+def find_undefined_variables(saved_requests, variable_dict):
+    """Return {index: [undefined variable names]} for saved requests that reference undefined variables"""
+    undefined = {}
+    for index, req in enumerate(saved_requests):
+        names = compile_request(req).undefined(variable_dict)
+        if names:
+            undefined[index] = names
+    return undefined